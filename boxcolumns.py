@@ -0,0 +1,190 @@
+import json
+import sys
+
+import numpy as np
+
+from boxdata import BoxData
+from boxio import load_boxes_from_file, remove_empty, save_boxes_to_file
+
+FrameIndex = int
+FrameBoxes = dict[FrameIndex, list[BoxData]]
+
+BOX_COLUMNS_EXTENSION: str = ".boxcols"
+BOX_COLUMNS_MAGIC: bytes = b"PINBOXC1"
+BOX_COLUMNS_ALIGNMENT: int = 64  # Arrays start on this byte boundary so they can be memory-mapped
+SOURCES: list[str] = ['user', 'automatic']  # Stored as their index in this list
+
+
+class BoxColumns:
+    """Boxes for a whole video held column by column in numpy arrays instead of one BoxData per box.
+
+    Boxes are grouped by frame: frame_keys lists the frames in the order they were saved, including
+    frames with no boxes, and frame_starts[i]:frame_starts[i + 1] are the rows of frame_keys[i].
+    Each box's tags are tag_ids[tag_starts[row]:tag_starts[row + 1]], indices into tag_table, so
+    repeated tags are stored once. Converting to and from the JSON box data loses nothing.
+    """
+    frame_keys: np.ndarray  # (F,) int32
+    frame_starts: np.ndarray  # (F + 1,) int64
+    coords: np.ndarray  # (N, 4) int32 x, y, w, h
+    sources: np.ndarray  # (N,) uint8 index into SOURCES
+    tag_starts: np.ndarray  # (N + 1,) int64
+    tag_ids: np.ndarray  # (T,) int32 index into tag_table
+    tag_table: list[str]
+    __positions: dict[FrameIndex, int] | None = None
+
+    def __init__(
+        self,
+        frame_keys: np.ndarray,
+        frame_starts: np.ndarray,
+        coords: np.ndarray,
+        sources: np.ndarray,
+        tag_starts: np.ndarray,
+        tag_ids: np.ndarray,
+        tag_table: list[str]
+    ):
+        self.frame_keys = frame_keys
+        self.frame_starts = frame_starts
+        self.coords = coords
+        self.sources = sources
+        self.tag_starts = tag_starts
+        self.tag_ids = tag_ids
+        self.tag_table = tag_table
+
+    def __len__(self) -> int:
+        return len(self.coords)
+
+    @property
+    def frames(self) -> np.ndarray:
+        """Frame index of each box."""
+        return np.repeat(self.frame_keys, np.diff(self.frame_starts))
+
+    @staticmethod
+    def from_frame_boxes(frame_boxes: FrameBoxes) -> "BoxColumns":
+        frame_keys: list[int] = []
+        frame_starts: list[int] = [0]
+        coords: list[tuple[int, int, int, int]] = []
+        sources: list[int] = []
+        tag_starts: list[int] = [0]
+        tag_ids: list[int] = []
+        tag_lookup: dict[str, int] = {}
+        source_lookup = {source: i for i, source in enumerate(SOURCES)}
+
+        for frame, boxes in frame_boxes.items():
+            frame_keys.append(frame)
+            for box in boxes:
+                coords.append(box.coords)
+                sources.append(source_lookup[box.source])
+                # Empty tags are dropped, as they are when saving JSON
+                for tag in remove_empty(box.tags):
+                    tag_ids.append(tag_lookup.setdefault(tag, len(tag_lookup)))
+                tag_starts.append(len(tag_ids))
+            frame_starts.append(len(coords))
+
+        coord_array = np.array(coords, dtype=np.int32).reshape(-1, 4)
+        if not np.array_equal(coord_array, np.array(coords, dtype=np.float64).reshape(-1, 4)):
+            raise ValueError("Box coordinates must be whole numbers that fit in 32 bits")
+        return BoxColumns(
+            frame_keys=np.array(frame_keys, dtype=np.int32),
+            frame_starts=np.array(frame_starts, dtype=np.int64),
+            coords=coord_array,
+            sources=np.array(sources, dtype=np.uint8),
+            tag_starts=np.array(tag_starts, dtype=np.int64),
+            tag_ids=np.array(tag_ids, dtype=np.int32),
+            tag_table=list(tag_lookup)
+        )
+
+    def __boxes_in_rows(self, start: int, end: int) -> list[BoxData]:
+        coords = self.coords[start:end].tolist()
+        sources = self.sources[start:end].tolist()
+        tag_starts = self.tag_starts[start:end + 1].tolist()
+        tag_ids = self.tag_ids[tag_starts[0]:tag_starts[-1]].tolist()
+        base = tag_starts[0]
+        return [
+            BoxData(
+                tuple(coords[i]),
+                [self.tag_table[t] for t in tag_ids[tag_starts[i] - base:tag_starts[i + 1] - base]],
+                SOURCES[sources[i]]
+            )
+            for i in range(end - start)
+        ]
+
+    def boxes_for_frame(self, index: FrameIndex) -> list[BoxData] | None:
+        """Make BoxData objects for one frame's boxes only, or None if the frame was not stored."""
+        if self.__positions is None:
+            self.__positions = {frame: i for i, frame in enumerate(self.frame_keys.tolist())}
+        position = self.__positions.get(index)
+        if position is None:
+            return None
+        return self.__boxes_in_rows(int(self.frame_starts[position]), int(self.frame_starts[position + 1]))
+
+    def to_frame_boxes(self) -> FrameBoxes:
+        starts = self.frame_starts.tolist()
+        return {
+            frame: self.__boxes_in_rows(starts[i], starts[i + 1])
+            for i, frame in enumerate(self.frame_keys.tolist())
+        }
+
+    def __arrays(self) -> dict[str, np.ndarray]:
+        return {
+            'frame_keys': self.frame_keys,
+            'frame_starts': self.frame_starts,
+            'coords': self.coords,
+            'sources': self.sources,
+            'tag_starts': self.tag_starts,
+            'tag_ids': self.tag_ids,
+        }
+
+    def save(self, filename: str) -> None:
+        """Write a magic number, a JSON header of the array layouts and tag table, then the raw arrays."""
+        arrays = self.__arrays()
+        layout: dict[str, dict] = {}
+        offset = 0
+        for name, array in arrays.items():
+            offset = -(-offset // BOX_COLUMNS_ALIGNMENT) * BOX_COLUMNS_ALIGNMENT
+            layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset += array.nbytes
+        header = json.dumps({'arrays': layout, 'tags': self.tag_table}).encode('utf-8')
+
+        # Array offsets are relative to the first aligned position after the header
+        data_start = len(BOX_COLUMNS_MAGIC) + 8 + len(header)
+        data_start = -(-data_start // BOX_COLUMNS_ALIGNMENT) * BOX_COLUMNS_ALIGNMENT
+        with open(filename, "wb") as f:
+            f.write(BOX_COLUMNS_MAGIC)
+            f.write(len(header).to_bytes(8, 'little'))
+            f.write(header)
+            for name, array in arrays.items():
+                f.write(b'\0' * (data_start + layout[name]['offset'] - f.tell()))
+                f.write(np.ascontiguousarray(array).tobytes())
+
+    @staticmethod
+    def load(filename: str, mmap: bool = True) -> "BoxColumns":
+        """Load a file written by save. With mmap the arrays are read-only views paged in from the file on use."""
+        with open(filename, "rb") as f:
+            if f.read(len(BOX_COLUMNS_MAGIC)) != BOX_COLUMNS_MAGIC:
+                raise ValueError(f"{filename} is not a box columns file")
+            header_length = int.from_bytes(f.read(8), 'little')
+            header = json.loads(f.read(header_length).decode('utf-8'))
+            data_start = len(BOX_COLUMNS_MAGIC) + 8 + header_length
+            data_start = -(-data_start // BOX_COLUMNS_ALIGNMENT) * BOX_COLUMNS_ALIGNMENT
+
+            arrays: dict[str, np.ndarray] = {}
+            for name, entry in header['arrays'].items():
+                dtype = np.dtype(entry['dtype'])
+                shape = tuple(entry['shape'])
+                offset = data_start + entry['offset']
+                if mmap and int(np.prod(shape)) > 0:
+                    arrays[name] = np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=shape)
+                else:
+                    f.seek(offset)
+                    count = int(np.prod(shape))
+                    arrays[name] = np.fromfile(f, dtype=dtype, count=count).reshape(shape)
+        return BoxColumns(tag_table=header['tags'], **arrays)
+
+
+if __name__ == '__main__':
+    # Convert between the JSON and columnar formats: boxcolumns.py <input> <output>
+    source_filename, target_filename = sys.argv[1], sys.argv[2]
+    if source_filename.endswith(BOX_COLUMNS_EXTENSION):
+        save_boxes_to_file(target_filename, BoxColumns.load(source_filename).to_frame_boxes())
+    else:
+        BoxColumns.from_frame_boxes(load_boxes_from_file(source_filename)).save(target_filename)
@@ -0,0 +1,72 @@
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from boxcolumns import BoxColumns
+from boxdata import BoxData
+from boxio import load_boxes_from_stream, save_boxes_to_stream
+
+
+def frame_boxes_to_json(frame_boxes) -> str:
+    stream = io.StringIO()
+    save_boxes_to_stream(stream, frame_boxes)
+    return stream.getvalue()
+
+
+class TestBoxColumns(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, 'video.boxcols')
+        self.frame_boxes = {
+            3: [BoxData((10, 20, 30, 40), ['pin', 'blue'], 'user'), BoxData((1, 2, 3, 4), [], 'automatic')],
+            0: [],
+            12: [BoxData((5, 6, 7, 8), ['pin'], 'automatic')],
+        }
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trips_json_losslessly(self):
+        frame_boxes = load_boxes_from_stream(io.StringIO(frame_boxes_to_json(self.frame_boxes)))
+        expected = frame_boxes_to_json(frame_boxes)
+        BoxColumns.from_frame_boxes(frame_boxes).save(self.filename)
+        loaded = BoxColumns.load(self.filename)
+        self.assertEqual(frame_boxes_to_json(loaded.to_frame_boxes()), expected)
+
+    def test_columns_and_interned_tags(self):
+        columns = BoxColumns.from_frame_boxes(self.frame_boxes)
+        self.assertEqual(len(columns), 3)
+        self.assertEqual(columns.tag_table, ['pin', 'blue'])
+        self.assertEqual(columns.frames.tolist(), [3, 3, 12])
+        self.assertEqual(columns.sources.tolist(), [0, 1, 1])
+
+    def test_load_memory_maps_arrays(self):
+        BoxColumns.from_frame_boxes(self.frame_boxes).save(self.filename)
+        loaded = BoxColumns.load(self.filename)
+        self.assertIsInstance(loaded.coords, np.memmap)
+        self.assertFalse(loaded.coords.flags.writeable)
+        in_memory = BoxColumns.load(self.filename, mmap=False)
+        self.assertTrue(np.array_equal(in_memory.coords, loaded.coords))
+
+    def test_boxes_for_single_frame(self):
+        BoxColumns.from_frame_boxes(self.frame_boxes).save(self.filename)
+        loaded = BoxColumns.load(self.filename)
+        (box,) = loaded.boxes_for_frame(12)
+        self.assertEqual((box.coords, box.tags, box.source), ((5, 6, 7, 8), ['pin'], 'automatic'))
+        self.assertEqual(loaded.boxes_for_frame(0), [])
+        self.assertIsNone(loaded.boxes_for_frame(7))
+
+    def test_empty_project(self):
+        BoxColumns.from_frame_boxes({}).save(self.filename)
+        self.assertEqual(BoxColumns.load(self.filename).to_frame_boxes(), {})
+
+    def test_rejects_fractional_coords(self):
+        with self.assertRaises(ValueError):
+            BoxColumns.from_frame_boxes({0: [BoxData((1.5, 2, 3, 4), ['pin'], 'user')]})
+
+
+if __name__ == '__main__':
+    unittest.main()
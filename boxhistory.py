@@ -0,0 +1,204 @@
+import time
+from collections import deque
+from typing import Callable
+
+from boxdata import BoxData, TagLabel
+
+FrameIndex = int
+
+HISTORY_DEPTH: int = 200  # Undo steps kept before the oldest are forgotten
+TAG_EDIT_COALESCE_SECONDS: float = 2.0  # Tag edits to one box this close together undo as one
+
+
+def index_of_box(boxes: list[BoxData], box: BoxData) -> int:
+    """Find the position of this very box object, not just one with the same contents."""
+    for i, candidate in enumerate(boxes):
+        if candidate is box:
+            return i
+    raise ValueError(f"{box} is not in the box list")
+
+
+class BoxCommand:
+    """One edit to a list of boxes that knows how to reverse itself.
+
+    Commands hold only the boxes and values they change, so the history costs memory in proportion
+    to the number of edits rather than to the number of boxes on screen.
+    """
+    box: BoxData
+
+    def undo(self, boxes: list[BoxData]) -> None:
+        raise NotImplementedError
+
+    def redo(self, boxes: list[BoxData]) -> None:
+        raise NotImplementedError
+
+    def merge(self, newer: "BoxCommand") -> bool:
+        """Fold a newer command into this one if they should undo together, returning whether it was folded."""
+        return False
+
+
+class AddBox(BoxCommand):
+    index: int
+
+    def __init__(self, box: BoxData, index: int):
+        self.box = box
+        self.index = index
+
+    def undo(self, boxes: list[BoxData]) -> None:
+        del boxes[index_of_box(boxes, self.box)]
+
+    def redo(self, boxes: list[BoxData]) -> None:
+        boxes.insert(min(self.index, len(boxes)), self.box)
+
+
+class RemoveBox(BoxCommand):
+    index: int
+
+    def __init__(self, box: BoxData, index: int):
+        self.box = box
+        self.index = index
+
+    def undo(self, boxes: list[BoxData]) -> None:
+        boxes.insert(min(self.index, len(boxes)), self.box)
+
+    def redo(self, boxes: list[BoxData]) -> None:
+        del boxes[index_of_box(boxes, self.box)]
+
+
+class ChangeTags(BoxCommand):
+    old_tags: list[TagLabel]
+    new_tags: list[TagLabel]
+    edited_at: float
+
+    def __init__(self, box: BoxData, old_tags: list[TagLabel], new_tags: list[TagLabel], edited_at: float | None = None):
+        self.box = box
+        self.old_tags = list(old_tags)
+        self.new_tags = list(new_tags)
+        self.edited_at = time.monotonic() if edited_at is None else edited_at
+
+    def undo(self, boxes: list[BoxData]) -> None:
+        # The box's own list is updated in place, as the tag panel edits it
+        self.box.tags[:] = self.old_tags
+
+    def redo(self, boxes: list[BoxData]) -> None:
+        self.box.tags[:] = self.new_tags
+
+    def merge(self, newer: BoxCommand) -> bool:
+        if not isinstance(newer, ChangeTags) or newer.box is not self.box:
+            return False
+        if newer.edited_at - self.edited_at > TAG_EDIT_COALESCE_SECONDS:
+            return False
+        self.new_tags = newer.new_tags
+        self.edited_at = newer.edited_at
+        return True
+
+
+FrameEdit = tuple[FrameIndex, BoxCommand]
+
+
+class EditBatch:
+    """Commands that undo and redo together as one step, each against the boxes of one frame.
+
+    Propagation batches, from tracking boxes on to following frames, chain with the batch that
+    tracked into the frame before them, so a whole run of propagation undoes at once.
+    """
+    edits: list[FrameEdit]
+    is_propagation: bool
+
+    def __init__(self, edits: list[FrameEdit], is_propagation: bool = False):
+        if not edits:
+            raise ValueError("An edit batch needs at least one edit")
+        self.edits = edits
+        self.is_propagation = is_propagation
+
+    @property
+    def first_frame(self) -> FrameIndex:
+        """The frame the batch's first edit was made in, to go back to after undoing it."""
+        return self.edits[0][0]
+
+    @property
+    def last_frame(self) -> FrameIndex:
+        return self.edits[-1][0]
+
+    @property
+    def frames(self) -> list[FrameIndex]:
+        """Every frame the batch changes, in the order they were first changed."""
+        return list(dict.fromkeys(frame for frame, _ in self.edits))
+
+    def undo(self, frame_boxes: Callable[[FrameIndex], list[BoxData]]) -> None:
+        for frame, command in reversed(self.edits):
+            command.undo(frame_boxes(frame))
+
+    def redo(self, frame_boxes: Callable[[FrameIndex], list[BoxData]]) -> None:
+        for frame, command in self.edits:
+            command.redo(frame_boxes(frame))
+
+    def merge(self, newer: "EditBatch") -> bool:
+        """Fold a newer batch into this one if they should undo together, returning whether it was folded."""
+        if self.is_propagation and newer.is_propagation:
+            if newer.first_frame != self.last_frame + 1:
+                return False
+            self.edits.extend(newer.edits)
+            return True
+        if self.is_propagation or newer.is_propagation or len(self.edits) != 1 or len(newer.edits) != 1:
+            return False
+        (frame, command), (newer_frame, newer_command) = self.edits[0], newer.edits[0]
+        return frame == newer_frame and command.merge(newer_command)
+
+
+class BoxHistory:
+    """Undo and redo stacks of edits across all of a video's frames, keeping at most max_depth steps to undo.
+
+    The boxes of each frame are looked up when an edit is undone or redone, so steps can be undone
+    whichever frame is showing and frames do not need to stay loaded.
+    """
+    __undo: deque[EditBatch]
+    __redo: list[EditBatch]
+
+    def __init__(self, max_depth: int = HISTORY_DEPTH):
+        self.__undo = deque(maxlen=max_depth)
+        self.__redo = []
+
+    @property
+    def can_undo(self) -> bool:
+        return len(self.__undo) > 0
+
+    @property
+    def can_redo(self) -> bool:
+        return len(self.__redo) > 0
+
+    def __len__(self) -> int:
+        return len(self.__undo)
+
+    def record(self, frame: FrameIndex, command: BoxCommand) -> None:
+        """Record an edit to a frame's boxes that has already been applied."""
+        self.record_batch(EditBatch([(frame, command)]))
+
+    def record_batch(self, batch: EditBatch) -> None:
+        """Record applied edits as one step. Any steps that were undone can no longer be redone."""
+        self.__redo.clear()
+        if self.__undo and self.__undo[-1].merge(batch):
+            return
+        self.__undo.append(batch)
+
+    def undo(self, frame_boxes: Callable[[FrameIndex], list[BoxData]]) -> EditBatch | None:
+        """Reverse the latest step, returning it, or None if there is nothing to undo."""
+        if not self.__undo:
+            return None
+        batch = self.__undo.pop()
+        batch.undo(frame_boxes)
+        self.__redo.append(batch)
+        return batch
+
+    def redo(self, frame_boxes: Callable[[FrameIndex], list[BoxData]]) -> EditBatch | None:
+        """Reapply the latest undone step, returning it, or None if there is nothing to redo."""
+        if not self.__redo:
+            return None
+        batch = self.__redo.pop()
+        batch.redo(frame_boxes)
+        self.__undo.append(batch)
+        return batch
+
+    def clear(self) -> None:
+        self.__undo.clear()
+        self.__redo.clear()
@@ -0,0 +1,119 @@
+import unittest
+
+from boxdata import BoxData
+from boxhistory import AddBox, BoxHistory, ChangeTags, EditBatch, RemoveBox, TAG_EDIT_COALESCE_SECONDS
+
+
+class TestBoxHistory(unittest.TestCase):
+    def setUp(self):
+        self.first = BoxData((0, 0, 10, 10), ['a'], 'user')
+        self.second = BoxData((20, 0, 10, 10), ['b'], 'automatic')
+        self.boxes = [self.first, self.second]
+        self.frame_boxes = {0: self.boxes}
+        self.history = BoxHistory()
+
+    def test_undo_and_redo_add_and_remove(self):
+        added = BoxData((40, 0, 10, 10), ['c'], 'user')
+        self.boxes.append(added)
+        self.history.record(0, AddBox(added, 2))
+        del self.boxes[0]
+        self.history.record(0, RemoveBox(self.first, 0))
+        list_before = self.boxes
+
+        self.history.undo(self.frame_boxes.get)
+        self.assertEqual(self.boxes, [self.first, self.second, added])
+        self.history.undo(self.frame_boxes.get)
+        self.assertEqual(self.boxes, [self.first, self.second])
+        self.assertIsNone(self.history.undo(self.frame_boxes.get))
+
+        self.history.redo(self.frame_boxes.get)
+        self.history.redo(self.frame_boxes.get)
+        self.assertEqual(self.boxes, [self.second, added])
+        self.assertIs(self.boxes, list_before)
+        self.assertIsNone(self.history.redo(self.frame_boxes.get))
+
+    def test_undo_tags_in_place(self):
+        tags = self.second.tags
+        self.second.tags.append('x')
+        self.history.record(0, ChangeTags(self.second, ['b'], self.second.tags))
+
+        self.history.undo(self.frame_boxes.get)
+        self.assertEqual(self.second.tags, ['b'])
+        self.assertIs(self.second.tags, tags)
+        self.history.redo(self.frame_boxes.get)
+        self.assertEqual(self.second.tags, ['b', 'x'])
+
+    def test_rapid_tag_edits_to_one_box_undo_together(self):
+        for i, label in enumerate(['p', 'pi', 'pin']):
+            old_tags = list(self.first.tags)
+            self.first.tags[0] = label
+            self.history.record(0, ChangeTags(self.first, old_tags, self.first.tags, edited_at=100.0 + i * 0.5))
+        self.assertEqual(len(self.history), 1)
+
+        # Edits to another box or after a pause are kept apart
+        self.second.tags[0] = 'c'
+        self.history.record(0, ChangeTags(self.second, ['b'], self.second.tags, edited_at=101.5))
+        self.first.tags[0] = 'pins'
+        self.history.record(0, ChangeTags(self.first, ['pin'], self.first.tags, edited_at=102 + TAG_EDIT_COALESCE_SECONDS))
+        self.assertEqual(len(self.history), 3)
+
+        self.history.undo(self.frame_boxes.get)
+        self.history.undo(self.frame_boxes.get)
+        self.history.undo(self.frame_boxes.get)
+        self.assertEqual((self.first.tags, self.second.tags), (['a'], ['b']))
+
+    def test_depth_cap_forgets_oldest_edits(self):
+        history = BoxHistory(max_depth=3)
+        for i in range(5):
+            box = BoxData((i, 0, 1, 1), [], 'user')
+            self.boxes.append(box)
+            history.record(0, AddBox(box, len(self.boxes) - 1))
+        while history.undo(self.frame_boxes.get) is not None:
+            pass
+        self.assertEqual(len(self.boxes), 4)
+
+    def test_recording_clears_redo(self):
+        self.boxes.remove(self.second)
+        self.history.record(0, RemoveBox(self.second, 1))
+        self.history.undo(self.frame_boxes.get)
+        self.assertTrue(self.history.can_redo)
+        self.first.tags.append('z')
+        self.history.record(0, ChangeTags(self.first, ['a'], self.first.tags))
+        self.assertFalse(self.history.can_redo)
+
+    def test_propagation_across_frames_undoes_as_one_step(self):
+        user_box = BoxData((1, 1, 5, 5), ['user'], 'user')
+        self.boxes.append(user_box)
+        self.history.record(0, AddBox(user_box, 2))
+        for frame in range(1, 501):
+            tracked = [BoxData((frame, 0, 10, 10), ['a'], 'automatic')]
+            self.frame_boxes[frame] = list(tracked)
+            self.history.record_batch(EditBatch([(frame, AddBox(tracked[0], 0))], is_propagation=True))
+        self.assertEqual(len(self.history), 2)
+
+        batch = self.history.undo(self.frame_boxes.get)
+        self.assertEqual((batch.first_frame, batch.last_frame, len(batch.frames)), (1, 500, 500))
+        self.assertTrue(all(self.frame_boxes[frame] == [] for frame in range(1, 501)))
+        self.assertIn(user_box, self.boxes)
+
+        self.history.redo(self.frame_boxes.get)
+        self.assertEqual(self.frame_boxes[250][0].coords, (250, 0, 10, 10))
+
+    def test_propagation_only_chains_into_the_next_frame(self):
+        for frame in [1, 2, 5]:
+            box = BoxData((frame, 0, 1, 1), [], 'automatic')
+            self.frame_boxes[frame] = [box]
+            self.history.record_batch(EditBatch([(frame, AddBox(box, 0))], is_propagation=True))
+        self.assertEqual(len(self.history), 2)
+        self.assertEqual(self.history.undo(self.frame_boxes.get).frames, [5])
+
+    def test_tag_edits_in_different_frames_are_kept_apart(self):
+        other = BoxData((0, 0, 1, 1), ['a'], 'user')
+        self.frame_boxes[1] = [other]
+        self.history.record(0, ChangeTags(self.first, ['a'], ['b'], edited_at=1.0))
+        self.history.record(1, ChangeTags(other, ['a'], ['b'], edited_at=1.1))
+        self.assertEqual(len(self.history), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+from collections import defaultdict
+
+Rect = tuple[int, int, int, int]  # x, y, width, height
+Cell = tuple[int, int]
+
+GRID_CELL_SIZE: int = 64  # Bitmap pixels per side of a grid cell
+
+
+class BoxGrid:
+    """Uniform grid over boxes' rects, for finding which box a click hit or which boxes may overlap.
+
+    Each rect is listed in every cell it overlaps, so a lookup only tests the few rects in the
+    cells it touches instead of every box. For hit-testing on the displayed bitmap, build a new
+    grid when the boxes or the display scale or rotation change.
+    """
+    __rects: list[Rect]
+    __cells: dict[Cell, list[int]]
+    __cell_size: int
+
+    def __init__(self, rects: list[Rect] = (), cell_size: int = GRID_CELL_SIZE):
+        self.__rects = []
+        self.__cell_size = max(1, cell_size)
+        self.__cells = defaultdict(list)
+        for rect in rects:
+            self.add(rect)
+
+    def __len__(self) -> int:
+        return len(self.__rects)
+
+    def rect(self, i: int) -> Rect:
+        return self.__rects[i]
+
+    def __cells_of(self, rect: Rect) -> list[Cell]:
+        x, y, w, h = rect
+        if w <= 0 or h <= 0:
+            return []
+        size = self.__cell_size
+        return [
+            (cx, cy)
+            for cx in range(int(x // size), int((x + w - 1) // size) + 1)
+            for cy in range(int(y // size), int((y + h - 1) // size) + 1)
+        ]
+
+    def add(self, rect: Rect) -> int:
+        """Add a rect on top of the others, returning its index."""
+        i = len(self.__rects)
+        self.__rects.append(rect)
+        for cell in self.__cells_of(rect):
+            self.__cells[cell].append(i)
+        return i
+
+    def move(self, i: int, rect: Rect) -> None:
+        """Change the rect at index i. It stays listed in its old cells, which candidates allows for."""
+        self.__rects[i] = rect
+        for cell in self.__cells_of(rect):
+            if i not in self.__cells[cell]:
+                self.__cells[cell].append(i)
+
+    def candidates(self, rect: Rect) -> set[int]:
+        """Indices of every rect that might overlap rect: all that do, and some that do not."""
+        found: set[int] = set()
+        for cell in self.__cells_of(rect):
+            found.update(self.__cells.get(cell, ()))
+        return found
+
+    def hit(self, x: int, y: int) -> int | None:
+        """Index of the topmost rect containing the point, the one drawn last, or None if there is none."""
+        candidates = self.__cells.get((int(x // self.__cell_size), int(y // self.__cell_size)))
+        if not candidates:
+            return None
+        hits = [i for i in candidates if self.__contains(i, x, y)]
+        return max(hits) if hits else None
+
+    def __contains(self, i: int, x: int, y: int) -> bool:
+        rx, ry, rw, rh = self.__rects[i]
+        return rx <= x < rx + rw and ry <= y < ry + rh
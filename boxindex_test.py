@@ -0,0 +1,46 @@
+import random
+import unittest
+
+from boxindex import BoxGrid
+
+
+def contains(rect, x, y):
+    rx, ry, rw, rh = rect
+    return rx <= x < rx + rw and ry <= y < ry + rh
+
+
+class TestBoxGrid(unittest.TestCase):
+    def test_hit_finds_topmost_containing_rect(self):
+        grid = BoxGrid([(0, 0, 100, 100), (50, 50, 100, 100), (300, 300, 10, 10)])
+        self.assertEqual(grid.hit(10, 10), 0)
+        self.assertEqual(grid.hit(60, 60), 1)
+        self.assertEqual(grid.hit(305, 309), 2)
+        self.assertIsNone(grid.hit(310, 305))
+        self.assertIsNone(grid.hit(200, 10))
+
+    def test_zero_sized_rects_are_never_hit(self):
+        grid = BoxGrid([(10, 10, 0, 20), (5, 5, 10, 10)])
+        self.assertEqual(grid.hit(10, 12), 1)
+
+    def test_candidates_include_every_overlapping_rect(self):
+        grid = BoxGrid(cell_size=10)
+        grid.add((0, 0, 10, 10))
+        grid.add((100, 100, 10, 10))
+        self.assertEqual(grid.candidates((5, 5, 10, 10)), {0})
+        grid.move(0, (95, 95, 10, 10))
+        self.assertIn(0, grid.candidates((100, 100, 5, 5)))
+        self.assertEqual(grid.hit(104, 104), 1)
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(7)
+        rects = [(rng.randrange(1000), rng.randrange(800), rng.randrange(1, 120), rng.randrange(1, 120))
+                 for _ in range(300)]
+        grid = BoxGrid(rects)
+        for _ in range(2000):
+            x, y = rng.randrange(1100), rng.randrange(900)
+            expected = next((i for i in reversed(range(len(rects))) if contains(rects[i], x, y)), None)
+            self.assertEqual(grid.hit(x, y), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
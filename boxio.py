@@ -0,0 +1,161 @@
+import json
+import os
+from copy import copy
+from typing import List, Dict
+
+from boxdata import BoxData, Coordinate
+from boxindex import BoxGrid
+from logutil import getLog
+
+try:
+    import orjson  # Optional; encodes and decodes large box files several times faster than json
+except ImportError:
+    orjson = None
+
+FAST_JSON: bool = orjson is not None  # Use orjson when it is installed
+SOURCE_JSON: dict[str | None, str] = {source: json.dumps(source) for source in ['user', 'automatic', None]}
+DUPLICATE_IOU_THRESHOLD: float = 0.85  # Overlap above which two boxes are taken to be the same object
+
+def create_box_data_name_from_filename(file_name: str) -> str:
+    """Return the filename with its extension replaced by .json."""
+    base, _ = os.path.splitext(file_name)
+    return base + ".json"
+
+def remove_empty(tags: List[str]) -> List[str]:
+    """Remove empty tags from the list."""
+    return [tag for tag in tags if tag.strip()]
+
+def box_to_dict(box: BoxData) -> dict:
+    return {"coords": box.coords, "tags": remove_empty(box.tags), "source": box.source}
+
+def box_from_dict(data: dict) -> BoxData:
+    return BoxData(tuple(data["coords"]), list(data["tags"]), data.get("source", "automatic"))
+
+def loads_json(text: str | bytes):
+    return orjson.loads(text) if FAST_JSON else json.loads(text)
+
+def boxes_to_json(boxes: List[BoxData], tags_cache: Dict[tuple, str] | None = None) -> str:
+    """Encode one frame's box list as JSON text.
+
+    tags_cache: encoded tag lists by tags, shared between calls as the same tags repeat across frames.
+    """
+    if FAST_JSON:
+        return orjson.dumps([box_to_dict(box) for box in boxes]).decode("utf-8")
+    if tags_cache is None:
+        tags_cache = {}
+    parts = []
+    for box in boxes:
+        tags = tuple(box.tags)
+        tags_json = tags_cache.get(tags)
+        if tags_json is None:
+            tags_json = json.dumps(remove_empty(box.tags))
+            tags_cache[tags] = tags_json
+        x, y, w, h = box.coords
+        source_json = SOURCE_JSON.get(box.source) or json.dumps(box.source)
+        # Same text json.dump produces for box_to_dict(box)
+        parts.append(f'{{"coords": [{x}, {y}, {w}, {h}], "tags": {tags_json}, "source": {source_json}}}')
+    return "[" + ", ".join(parts) + "]"
+
+def save_boxes_to_stream(stream, frame_boxes: dict[int, list[BoxData]]) -> None:
+    # frame_boxes: {frame_number: [BoxData, ...]}
+    # Written a frame at a time, so there is never a second copy of the whole project in memory
+    tags_cache: Dict[tuple, str] = {}
+    stream.write("{")
+    for i, (frame, boxes) in enumerate(frame_boxes.items()):
+        if i:
+            stream.write(", ")
+        stream.write(f'"{frame}": ')
+        stream.write(boxes_to_json(boxes, tags_cache))
+    stream.write("}")
+
+def save_boxes_to_file(filename: str, frame_boxes: dict[int, list[BoxData]]) -> None:
+    with open(filename, "w", encoding="utf-8") as f:
+        save_boxes_to_stream(f, frame_boxes)
+
+def box_iou(a: Coordinate, b: Coordinate) -> float:
+    """Intersection over union of two (x, y, w, h) boxes."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    overlap_w = min(ax + aw, bx + bw) - max(ax, bx)
+    overlap_h = min(ay + ah, by + bh) - max(ay, by)
+    if overlap_w <= 0 or overlap_h <= 0:
+        return 0.0
+    intersection = overlap_w * overlap_h
+    return intersection / (aw * ah + bw * bh - intersection)
+
+def merge_duplicate_boxes(boxes: List[BoxData], iou_threshold: float | None = None) -> List[BoxData]:
+    """Merge boxes with the same coordinates, combining their tags in first-seen order without duplicates.
+
+    iou_threshold: if set, also merge boxes that overlap at least this much. A user box absorbing
+    an automatic one keeps its coordinates; an automatic box absorbing a user one takes the user's.
+    """
+    merged: Dict[Coordinate, BoxData] = {}
+    seen_tags: Dict[Coordinate, set[str]] = {}
+    for box in boxes:
+        key = box.coords
+        target = merged.get(key)
+        if target is None:
+            target = BoxData(coords=box.coords, tags=[], source=box.source)
+            merged[key] = target
+            seen_tags[key] = set()
+        seen = seen_tags[key]
+        for tag in box.tags:
+            if tag.strip() and tag not in seen:
+                seen.add(tag)
+                target.tags.append(tag)
+
+    if iou_threshold is None:
+        return list(merged.values())
+
+    # Only boxes sharing a grid cell can overlap, so each box is compared with its neighbours rather
+    # than every box kept. Cells about the size of a typical box keep each box in a few cells.
+    sizes = sorted(max(box.coords[2], box.coords[3]) for box in merged.values())
+    grid = BoxGrid(cell_size=int(sizes[len(sizes) // 2]) if sizes else 1)
+    kept: List[BoxData] = []
+    for box in merged.values():
+        overlaps = [(box_iou(box.coords, kept[i].coords), i) for i in grid.candidates(box.coords)]
+        best_iou, best = max(overlaps, default=(0.0, -1))
+        if best_iou < iou_threshold:
+            grid.add(box.coords)
+            kept.append(box)
+            continue
+        target = kept[best]
+        if target.source == 'automatic' and box.source == 'user':
+            target.coords = box.coords
+            target.source = box.source
+            grid.move(best, box.coords)
+        target.tags.extend(tag for tag in box.tags if tag not in target.tags)
+    return kept
+
+def load_boxes_from_stream(stream) -> dict[int, list[BoxData]]:
+    data = loads_json(stream.read())
+    return {
+        int(frame): merge_duplicate_boxes([box_from_dict(box) for box in boxes])
+        for frame, boxes in data.items()
+    }
+
+def load_boxes_from_file(filename: str) -> dict[int, list[BoxData]]:
+    with open(filename, "r", encoding="utf-8") as f:
+        return load_boxes_from_stream(f)
+
+def filter_zero_sized_boxes(boxes: dict[int, list[BoxData]]) -> dict[int, list[BoxData]]:
+    """Filter out boxes with zero width or height."""
+    filtered_boxes: Dict[int, List[BoxData]] = {}
+    for frame_index, box_list in boxes.items():
+        for box in box_list:
+            if not isinstance(box, BoxData):
+                getLog().warning(f"Skipping non-BoxData object: {box}")
+                continue
+            if not isinstance(box.coords, tuple) or len(box.coords) != 4:
+                getLog().warning(f"Skipping box with invalid coords: {box.coords}")
+                continue
+            if not box.is_non_zero_sized():
+                getLog().debug(f"Skipping zero-sized box: {box.coords}")
+                continue
+
+            if frame_index not in filtered_boxes:
+                filtered_boxes[frame_index] = []
+            filtered_boxes[frame_index].append(box)
+
+    return filtered_boxes
+
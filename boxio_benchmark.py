@@ -0,0 +1,52 @@
+import argparse
+import os
+import tempfile
+import time
+from unittest import mock
+
+import boxio
+from boxdata import BoxData
+from boxio import load_boxes_from_file, save_boxes_to_file
+
+BOXES_PER_FRAME: int = 10
+DISTINCT_TAGS: int = 200
+
+
+def make_frame_boxes(box_count: int) -> dict[int, list[BoxData]]:
+    """Make box_count boxes spread over frames like a propagated video, with tags repeating between frames."""
+    return {
+        frame: [
+            BoxData((frame % 1000, i * 40, 32, 32), [f'pin-{(frame + i) % DISTINCT_TAGS}'], 'automatic')
+            for i in range(min(BOXES_PER_FRAME, box_count - frame * BOXES_PER_FRAME))
+        ]
+        for frame in range(-(-box_count // BOXES_PER_FRAME))
+    }
+
+
+def time_call(function, *args) -> float:
+    started = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - started
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Time saving and loading box data JSON with each available encoder.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='Box counts to time')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    encoders = [('json', False)] + ([('orjson', True)] if boxio.orjson is not None else [])
+    print(f'{"boxes":>10} {"encoder":>8} {"save s":>8} {"load s":>8} {"MB":>8}')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, 'boxes.json')
+        for size in args.sizes:
+            frame_boxes = make_frame_boxes(size)
+            for name, fast in encoders:
+                with mock.patch.object(boxio, 'FAST_JSON', fast):
+                    save_seconds = time_call(save_boxes_to_file, filename, frame_boxes)
+                    load_seconds = time_call(load_boxes_from_file, filename)
+                megabytes = os.path.getsize(filename) / 1e6
+                print(f'{size:>10} {name:>8} {save_seconds:>8.2f} {load_seconds:>8.2f} {megabytes:>8.1f}')
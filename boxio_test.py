@@ -0,0 +1,40 @@
+import io
+import json
+import unittest
+from unittest import mock
+
+import boxio
+from boxdata import BoxData
+from boxio import box_to_dict, load_boxes_from_stream, save_boxes_to_stream
+
+
+class TestBoxJson(unittest.TestCase):
+    frame_boxes = {
+        3: [BoxData((10, 20, 30, 40), ['pin', '', 'café'], 'user'), BoxData((1, 2, 3, 4), [], 'automatic')],
+        0: [],
+        12: [BoxData((5, 6, 7, 8), ['pin', '', 'café'], 'automatic')],
+    }
+
+    def test_streamed_json_matches_json_dump(self):
+        expected = json.dumps({
+            frame: [box_to_dict(box) for box in boxes] for frame, boxes in self.frame_boxes.items()
+        })
+        stream = io.StringIO()
+        with mock.patch.object(boxio, 'FAST_JSON', False):
+            save_boxes_to_stream(stream, self.frame_boxes)
+        self.assertEqual(stream.getvalue(), expected)
+
+    def test_round_trip_with_each_encoder(self):
+        for fast in [False, True] if boxio.orjson is not None else [False]:
+            with self.subTest(fast_json=fast), mock.patch.object(boxio, 'FAST_JSON', fast):
+                stream = io.StringIO()
+                save_boxes_to_stream(stream, self.frame_boxes)
+                loaded = load_boxes_from_stream(io.StringIO(stream.getvalue()))
+                self.assertEqual(list(loaded), [3, 0, 12])
+                self.assertEqual([box.coords for box in loaded[3]], [(10, 20, 30, 40), (1, 2, 3, 4)])
+                self.assertEqual(sorted(loaded[12][0].tags), ['café', 'pin'])
+                self.assertEqual(loaded[12][0].source, 'automatic')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import json
+import os
+from typing import TextIO
+
+from boxdata import BoxData
+from boxio import box_from_dict, box_to_dict, save_boxes_to_file
+from boxstore import LazyFrameBoxes
+from logutil import getLog
+
+FrameIndex = int
+FrameBoxes = dict[FrameIndex, list[BoxData]]
+
+JOURNAL_COMPACT_RECORDS: int = 500  # Journal records after which the snapshot is rewritten
+
+
+def create_journal_name_from_filename(box_data_filename: str) -> str:
+    """Return the box data filename with its extension replaced by .journal.jsonl."""
+    base, _ = os.path.splitext(box_data_filename)
+    return base + ".journal.jsonl"
+
+
+class BoxJournal:
+    """Append-only log of box changes kept alongside the JSON box data snapshot.
+
+    Each record holds the complete box list of one changed frame, so saving a change costs as much
+    as that frame's boxes rather than the whole project, and replaying the journal in order over
+    the snapshot restores the latest state after a crash. compact() folds the journal back into
+    the snapshot and empties it.
+    """
+    __snapshot_filename: str
+    __journal_filename: str
+    __compact_every: int
+    __stream: TextIO | None
+    __pending: int
+
+    def __init__(
+        self,
+        snapshot_filename: str,
+        journal_filename: str | None = None,
+        compact_every: int = JOURNAL_COMPACT_RECORDS
+    ):
+        self.__snapshot_filename = snapshot_filename
+        self.__journal_filename = journal_filename or create_journal_name_from_filename(snapshot_filename)
+        self.__compact_every = compact_every
+        self.__stream = None
+        self.__pending = 0
+
+    @property
+    def journal_filename(self) -> str:
+        return self.__journal_filename
+
+    @property
+    def pending(self) -> int:
+        """Number of records written since the snapshot was last compacted."""
+        return self.__pending
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self.__pending >= self.__compact_every
+
+    def replay(self, frame_boxes: FrameBoxes | LazyFrameBoxes) -> int:
+        """Apply the journal's records to frame_boxes loaded from the snapshot, returning how many were applied.
+
+        A record cut short by a crash is removed from the journal, so records appended after it stay readable.
+        """
+        if not os.path.exists(self.__journal_filename):
+            return 0
+        applied = 0
+        good_length = 0  # Bytes up to the end of the last complete record
+        with open(self.__journal_filename, "rb") as f:
+            for line_number, line in enumerate(f, 1):
+                if line.endswith(b"\n") and not line.strip():
+                    good_length += len(line)
+                    continue
+                try:
+                    # A record is only complete once its newline was written
+                    if not line.endswith(b"\n"):
+                        raise ValueError("record has no newline")
+                    record = json.loads(line)
+                except ValueError:
+                    # A crash while appending can only leave the last record cut short
+                    getLog().warning(f"Removing unreadable record at line {line_number} of {self.__journal_filename}")
+                    break
+                frame_boxes[int(record["frame"])] = [box_from_dict(box) for box in record["boxes"]]
+                good_length += len(line)
+                applied += 1
+        if good_length < os.path.getsize(self.__journal_filename):
+            os.truncate(self.__journal_filename, good_length)
+        self.__pending = applied
+        if applied:
+            getLog().info(f"Replayed {applied} box changes from {self.__journal_filename}")
+        return applied
+
+    def record_frame(self, index: FrameIndex, boxes: list[BoxData]) -> None:
+        """Append the current boxes of a changed frame to the journal."""
+        if self.__stream is None:
+            self.__stream = open(self.__journal_filename, "a", encoding="utf-8")
+        record = {"frame": index, "boxes": [box_to_dict(box) for box in boxes]}
+        self.__stream.write(json.dumps(record) + "\n")
+        self.__stream.flush()
+        self.__pending += 1
+
+    def compact(self, frame_boxes: FrameBoxes | LazyFrameBoxes) -> None:
+        """Write frame_boxes as the new snapshot and empty the journal."""
+        # Written beside the snapshot and renamed over it, so a crash leaves either the old or new snapshot
+        temp_filename = self.__snapshot_filename + ".tmp"
+        if isinstance(frame_boxes, LazyFrameBoxes):
+            frame_boxes.save_to_file(temp_filename)
+            frame_boxes.clear_dirty()
+        else:
+            save_boxes_to_file(temp_filename, frame_boxes)
+        os.replace(temp_filename, self.__snapshot_filename)
+
+        self.close()
+        if os.path.exists(self.__journal_filename):
+            os.remove(self.__journal_filename)
+        self.__pending = 0
+
+    def close(self) -> None:
+        if self.__stream is not None:
+            self.__stream.close()
+            self.__stream = None
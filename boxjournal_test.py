@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+from boxdata import BoxData
+from boxio import load_boxes_from_file, save_boxes_to_file
+from boxjournal import BoxJournal
+
+
+class TestBoxJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.snapshot = os.path.join(self.tmp_dir.name, 'video.json')
+        save_boxes_to_file(self.snapshot, {0: [BoxData((1, 2, 3, 4), ['pin'], 'user')]})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_replay_restores_recorded_frames(self):
+        journal = BoxJournal(self.snapshot)
+        journal.record_frame(0, [])
+        journal.record_frame(5, [BoxData((10, 20, 30, 40), ['a'], 'user')])
+        journal.record_frame(5, [BoxData((11, 20, 30, 40), ['b'], 'automatic')])
+        journal.close()
+
+        frame_boxes = load_boxes_from_file(self.snapshot)
+        self.assertEqual(BoxJournal(self.snapshot).replay(frame_boxes), 3)
+        self.assertEqual(frame_boxes[0], [])
+        (box,) = frame_boxes[5]
+        self.assertEqual((box.coords, box.tags, box.source), ((11, 20, 30, 40), ['b'], 'automatic'))
+
+    def test_replay_ignores_truncated_last_record(self):
+        journal = BoxJournal(self.snapshot)
+        journal.record_frame(3, [BoxData((1, 1, 5, 5), ['x'], 'user')])
+        journal.close()
+        with open(journal.journal_filename, 'a', encoding='utf-8') as f:
+            f.write('{"frame": 4, "boxes": [{"coo')
+
+        frame_boxes = {}
+        self.assertEqual(BoxJournal(self.snapshot).replay(frame_boxes), 1)
+        self.assertEqual(sorted(frame_boxes), [3])
+
+    def test_records_after_a_truncated_record_survive_another_replay(self):
+        journal = BoxJournal(self.snapshot)
+        journal.record_frame(1, [BoxData((1, 1, 5, 5), ['a'], 'user')])
+        journal.close()
+        with open(journal.journal_filename, 'a', encoding='utf-8') as f:
+            f.write('{"frame": 2, "boxes": [{"coo')
+
+        # The next session replays after the crash, then carries on recording
+        journal = BoxJournal(self.snapshot)
+        self.assertEqual(journal.replay({}), 1)
+        journal.record_frame(3, [BoxData((3, 3, 5, 5), ['c'], 'user')])
+        journal.record_frame(4, [BoxData((4, 4, 5, 5), ['d'], 'user')])
+        journal.close()
+
+        frame_boxes = {}
+        self.assertEqual(BoxJournal(self.snapshot).replay(frame_boxes), 3)
+        self.assertEqual(sorted(frame_boxes), [1, 3, 4])
+        self.assertEqual(frame_boxes[4][0].tags, ['d'])
+
+    def test_compact_writes_snapshot_and_empties_journal(self):
+        journal = BoxJournal(self.snapshot, compact_every=2)
+        frame_boxes = {0: [BoxData((1, 2, 3, 4), ['pin'], 'user')], 7: [BoxData((5, 5, 5, 5), ['new'], 'user')]}
+        journal.record_frame(7, frame_boxes[7])
+        self.assertFalse(journal.needs_compaction)
+        journal.record_frame(7, frame_boxes[7])
+        self.assertTrue(journal.needs_compaction)
+
+        journal.compact(frame_boxes)
+
+        self.assertEqual(journal.pending, 0)
+        self.assertFalse(os.path.exists(journal.journal_filename))
+        self.assertEqual(sorted(load_boxes_from_file(self.snapshot)), [0, 7])
+        # Later changes start a fresh journal
+        journal.record_frame(8, [])
+        journal.close()
+        self.assertEqual(BoxJournal(self.snapshot).replay({}), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+import os
+import re
+from collections.abc import MutableMapping
+from typing import Callable, Iterable, Iterator, TextIO
+
+from boxcolumns import BOX_COLUMNS_EXTENSION, BoxColumns
+from boxdata import BoxData
+from boxio import box_from_dict, boxes_to_json, filter_zero_sized_boxes, loads_json, merge_duplicate_boxes
+
+FrameIndex = int
+
+# A frame key and the start of its box list. Only frame keys are all digits and followed by a list:
+# every other key is one of a box's fixed keys, and quotes inside tags are always escaped.
+FRAME_KEY_PATTERN = re.compile(rb'"(-?\d+)"\s*:\s*\[')
+
+
+class LazyFrameBoxes(MutableMapping[FrameIndex, list[BoxData]]):
+    """Map of frame index to boxes that only builds a frame's BoxData list when it is first asked for.
+
+    Frames that have been set or marked dirty since the last save are tracked, so callers can skip
+    saving when nothing changed. Frames that were never loaded are saved from their original JSON
+    text without building their boxes.
+    """
+    __frames: dict[FrameIndex, list[BoxData] | None]  # None until the frame is loaded
+    __load_frame: Callable[[FrameIndex], list[BoxData]] | None
+    __count_frame: Callable[[FrameIndex], int] | None
+    __frame_json: Callable[[FrameIndex], str] | None
+    __dirty: set[FrameIndex]
+
+    def __init__(
+        self,
+        frames: Iterable[FrameIndex] = (),
+        load_frame: Callable[[FrameIndex], list[BoxData]] | None = None,
+        count_frame: Callable[[FrameIndex], int] | None = None,
+        frame_json: Callable[[FrameIndex], str] | None = None
+    ):
+        """
+        frames: indices of the frames available from load_frame, in saved order.
+        count_frame: counts a frame's boxes without loading it.
+        frame_json: gets a frame's box list as saved JSON text without loading it.
+        """
+        self.__frames = dict.fromkeys(frames)
+        self.__load_frame = load_frame
+        self.__count_frame = count_frame
+        self.__frame_json = frame_json
+        self.__dirty = set()
+
+    @staticmethod
+    def from_json_file(filename: str) -> "LazyFrameBoxes":
+        """Index the frames of a box data JSON file, decoding each frame's boxes only when it is loaded.
+
+        The file is read but not parsed; boxes are merged and filtered per frame as load_box_data used to.
+        """
+        with open(filename, "rb") as f:
+            data = f.read()
+        matches = list(FRAME_KEY_PATTERN.finditer(data))
+        end_of_object = data.rindex(b"}")
+        spans: dict[FrameIndex, tuple[int, int]] = {}
+        for i, match in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else end_of_object
+            spans[int(match.group(1))] = (match.end() - 1, end)
+
+        def raw(index: FrameIndex) -> bytes:
+            start, end = spans[index]
+            return data[start:end].rstrip(b", \t\r\n")
+
+        def load_frame(index: FrameIndex) -> list[BoxData]:
+            boxes = merge_duplicate_boxes([box_from_dict(box) for box in loads_json(raw(index))])
+            return filter_zero_sized_boxes({index: boxes}).get(index, [])
+
+        return LazyFrameBoxes(
+            spans,
+            load_frame,
+            count_frame=lambda index: raw(index).count(b'"coords"'),
+            frame_json=lambda index: raw(index).decode("utf-8")
+        )
+
+    @staticmethod
+    def from_box_data_file(filename: str) -> "LazyFrameBoxes":
+        """Load a box data JSON file, or the .boxcols file beside it if that was written more recently.
+
+        Boxes are saved as JSON, so a columnar copy older than the JSON is out of date and is ignored.
+        """
+        columns_filename = os.path.splitext(filename)[0] + BOX_COLUMNS_EXTENSION
+        if os.path.exists(columns_filename) and (
+            not os.path.exists(filename) or os.path.getmtime(columns_filename) > os.path.getmtime(filename)
+        ):
+            return LazyFrameBoxes.from_columns(BoxColumns.load(columns_filename))
+        return LazyFrameBoxes.from_json_file(filename)
+
+    @staticmethod
+    def from_columns(columns: BoxColumns) -> "LazyFrameBoxes":
+        starts = columns.frame_starts
+        positions = {frame: i for i, frame in enumerate(columns.frame_keys.tolist())}
+        return LazyFrameBoxes(
+            positions,
+            load_frame=lambda index: columns.boxes_for_frame(index) or [],
+            count_frame=lambda index: int(starts[positions[index] + 1] - starts[positions[index]])
+        )
+
+    def __getitem__(self, index: FrameIndex) -> list[BoxData]:
+        boxes = self.__frames[index]
+        if boxes is None:
+            boxes = self.__load_frame(index)
+            self.__frames[index] = boxes
+        return boxes
+
+    def __setitem__(self, index: FrameIndex, boxes: list[BoxData]) -> None:
+        self.__frames[index] = boxes
+        self.__dirty.add(index)
+
+    def __delitem__(self, index: FrameIndex) -> None:
+        del self.__frames[index]
+        self.__dirty.add(index)
+
+    def __contains__(self, index: object) -> bool:
+        return index in self.__frames
+
+    def __iter__(self) -> Iterator[FrameIndex]:
+        return iter(self.__frames)
+
+    def __len__(self) -> int:
+        return len(self.__frames)
+
+    def frame(self, index: FrameIndex) -> list[BoxData]:
+        """Get a frame's boxes, adding an empty list for frames without any. Adding one is not a change."""
+        if index not in self.__frames:
+            self.__frames[index] = []
+        return self[index]
+
+    def is_loaded(self, index: FrameIndex) -> bool:
+        return self.__frames.get(index) is not None
+
+    def box_count(self) -> int:
+        """Count the boxes in every frame without loading the frames."""
+        return sum(
+            len(boxes) if boxes is not None else self.__count_frame(index)
+            for index, boxes in self.__frames.items()
+        )
+
+    @property
+    def dirty_frames(self) -> set[FrameIndex]:
+        return set(self.__dirty)
+
+    def mark_dirty(self, index: FrameIndex) -> None:
+        """Record that a frame's box list was changed in place."""
+        self.__dirty.add(index)
+
+    def clear_dirty(self) -> None:
+        self.__dirty.clear()
+
+    def save_to_stream(self, stream: TextIO) -> None:
+        """Write the same JSON as save_boxes_to_stream, copying frames that were never loaded as they are."""
+        tags_cache: dict[tuple, str] = {}
+        stream.write("{")
+        for i, (index, boxes) in enumerate(self.__frames.items()):
+            if i:
+                stream.write(", ")
+            stream.write(f'"{index}": ')
+            if boxes is None and self.__frame_json is not None:
+                stream.write(self.__frame_json(index))
+            else:
+                stream.write(boxes_to_json(self[index], tags_cache))
+        stream.write("}")
+
+    def save_to_file(self, filename: str) -> None:
+        with open(filename, "w", encoding="utf-8") as f:
+            self.save_to_stream(f)
@@ -0,0 +1,96 @@
+import io
+import os
+import tempfile
+import unittest
+
+from boxcolumns import BoxColumns
+from boxdata import BoxData
+from boxio import load_boxes_from_file, save_boxes_to_file, save_boxes_to_stream
+from boxjournal import BoxJournal
+from boxstore import LazyFrameBoxes
+
+
+class TestLazyFrameBoxes(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, 'video.json')
+        self.frame_boxes = {
+            12: [BoxData((5, 6, 7, 8), ['pin'], 'automatic')],
+            3: [
+                BoxData((10, 20, 30, 40), ['a "quoted": [tag]'], 'user'),
+                BoxData((10, 20, 30, 40), ['other'], 'user'),  # Merged with the box above on load
+                BoxData((1, 2, 0, 4), ['flat'], 'automatic'),  # Zero sized, dropped on load
+            ],
+            0: [],
+        }
+        save_boxes_to_file(self.filename, self.frame_boxes)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_loads_frames_on_first_access(self):
+        boxes = LazyFrameBoxes.from_json_file(self.filename)
+        self.assertEqual(list(boxes), [12, 3, 0])
+        self.assertFalse(boxes.is_loaded(3))
+        self.assertEqual(boxes.box_count(), 4)
+
+        (box,) = boxes[3]
+        self.assertTrue(boxes.is_loaded(3))
+        self.assertFalse(boxes.is_loaded(12))
+        self.assertEqual(box.coords, (10, 20, 30, 40))
+        self.assertEqual(sorted(box.tags), ['a "quoted": [tag]', 'other'])
+        self.assertEqual(boxes.box_count(), 2)
+        self.assertEqual(boxes.dirty_frames, set())
+
+    def test_tracks_dirty_frames(self):
+        boxes = LazyFrameBoxes.from_json_file(self.filename)
+        self.assertEqual(boxes.frame(40), [])
+        self.assertEqual(boxes.dirty_frames, set())
+        boxes[5] = [BoxData((1, 1, 1, 1), ['x'], 'user')]
+        boxes[12].append(BoxData((9, 9, 9, 9), ['y'], 'user'))
+        boxes.mark_dirty(12)
+        self.assertEqual(boxes.dirty_frames, {5, 12})
+        boxes.clear_dirty()
+        self.assertEqual(boxes.dirty_frames, set())
+
+    def test_saves_unloaded_frames_unchanged(self):
+        boxes = LazyFrameBoxes.from_json_file(self.filename)
+        boxes[12].append(BoxData((9, 9, 9, 9), ['y'], 'user'))
+        stream = io.StringIO()
+        boxes.save_to_stream(stream)
+
+        expected = dict(self.frame_boxes)
+        expected[12] = expected[12] + [BoxData((9, 9, 9, 9), ['y'], 'user')]
+        expected_stream = io.StringIO()
+        save_boxes_to_stream(expected_stream, expected)
+        self.assertEqual(stream.getvalue(), expected_stream.getvalue())
+
+    def test_journal_compacts_lazy_boxes(self):
+        boxes = LazyFrameBoxes.from_json_file(self.filename)
+        journal = BoxJournal(self.filename)
+        boxes[7] = [BoxData((3, 3, 3, 3), ['new'], 'user')]
+        journal.record_frame(7, boxes[7])
+        journal.compact(boxes)
+        self.assertEqual(boxes.dirty_frames, set())
+        self.assertEqual(sorted(load_boxes_from_file(self.filename)), [0, 3, 7, 12])
+
+    def test_from_columns(self):
+        boxes = LazyFrameBoxes.from_columns(BoxColumns.from_frame_boxes(self.frame_boxes))
+        self.assertEqual(boxes.box_count(), 4)
+        self.assertEqual([box.tags for box in boxes[12]], [['pin']])
+
+
+    def test_from_box_data_file_prefers_newer_columns(self):
+        columns_filename = os.path.join(self.tmp_dir.name, 'video.boxcols')
+        BoxColumns.from_frame_boxes({5: [BoxData((1, 1, 1, 1), ['columns'], 'user')]}).save(columns_filename)
+        json_time = os.path.getmtime(self.filename)
+        os.utime(columns_filename, (json_time + 10, json_time + 10))
+        self.assertEqual(list(LazyFrameBoxes.from_box_data_file(self.filename)), [5])
+
+        # Saving the JSON again makes the columnar copy out of date
+        os.utime(columns_filename, (json_time - 10, json_time - 10))
+        self.assertEqual(sorted(LazyFrameBoxes.from_box_data_file(self.filename)), [0, 3, 12])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -210,14 +210,16 @@ class BoxTagPanelEdit(wx.Panel):
     def __on_label_edited(self, event: BoxLabelEditedEvent) -> None:
         """Handle label updates."""
         getLog().debug(f'{event.label_index}={event.new_label}')
+        old_tags = list(self.__box.tags)
         self.__box.set_tag(event.label_index, event.new_label)
-        boxUpdateEvent = BoxEditedEvent(self, self.__box)
+        boxUpdateEvent = BoxEditedEvent(self, self.__box, old_tags)
         wx.PostEvent(self, boxUpdateEvent)
 
     def __on_add_tag(self, event: wx.CommandEvent) -> None:
         # Add a new empty tag
+        old_tags = list(self.__box.tags)
         self.__box.tags.append("")
-        boxEditEvent = BoxEditedEvent(self, self.__box)
+        boxEditEvent = BoxEditedEvent(self, self.__box, old_tags)
         wx.PostEvent(self, boxEditEvent)
 
     def __on_label_repainted(self, event: wx.PaintEvent) -> None:
@@ -229,12 +231,13 @@ class BoxTagPanelEdit(wx.Panel):
         if event.label_index < 0 or event.label_index >= len(self.__box.tags):
             return
 
+        old_tags = list(self.__box.tags)
         self.__box.remove_tag(event.label_index)
-        boxEditEvent = BoxEditedEvent(self, self.__box)
+        boxEditEvent = BoxEditedEvent(self, self.__box, old_tags)
         wx.PostEvent(self, boxEditEvent)
 
     def update_after_edited(self, event: BoxLabelEditedEvent):
-        pass
+        event.Skip()  # Let the edit propagate up to the tag panel and frame
         # self.Refresh()
 
     @property
@@ -3,10 +3,12 @@ import json
 import wx
 
 from boxdata import BoxData
+from tracker import DEFAULT_TRACKER
 # from imagescrubber import ImageScrubber
 from videoscrubber import VideoScrubber
 
 file_name: str = "e:\\pindev\\PXL_20250715_015847092.mp4"
+tracker_name: str = DEFAULT_TRACKER  # 'template' or 'flow' are much faster when pins move only a little
 
 if __name__ == '__main__':
     app = wx.App(False)
@@ -16,5 +18,6 @@ if __name__ == '__main__':
     frame = VideoScrubber(None, 'Pinny Arcade video pin tagging tool', file_name)
     frame.get_frame(1)
     frame.load_box_data()
+    frame.tracker_name = tracker_name
     frame.Show()
     app.MainLoop()
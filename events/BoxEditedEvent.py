@@ -1,15 +1,19 @@
 import wx
 
-from boxdata import BoxData
+from boxdata import BoxData, TagLabel
 from events.events import wxEVT_BOX_EDITED
 
 
 class BoxEditedEvent(wx.CommandEvent):
-	def __init__(self, source: wx.Panel, box: BoxData):
+	box: BoxData
+	old_tags: list[TagLabel] | None  # The box's tags before the edit, if they were changed
+
+	def __init__(self, source: wx.Panel, box: BoxData, old_tags: list[TagLabel] | None = None):
 		super().__init__(wxEVT_BOX_EDITED, source.GetId())
 		self.SetEventObject(source)
 		self.box = box
+		self.old_tags = old_tags
 
 	def Clone(self) -> "BoxEditedEvent":
 		# wxPython uses this to copy events internally
-		return BoxEditedEvent(self.GetEventObject(), self.box) # type: ignore[arg-type]
\ No newline at end of file
+		return BoxEditedEvent(self.GetEventObject(), self.box, self.old_tags) # type: ignore[arg-type]
\ No newline at end of file
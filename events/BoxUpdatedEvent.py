@@ -6,12 +6,14 @@ from events.events import wxEVT_BOX_UPDATED
 
 class BoxUpdatedEvent(wx.CommandEvent):
 	boxes: list[BoxData]
+	boxes_changed: bool  # False when only the way the boxes are shown changed, e.g. rotating the view
 
-	def __init__(self, source: wx.Panel, boxes: list[BoxData]):
+	def __init__(self, source: wx.Panel, boxes: list[BoxData], boxes_changed: bool = True):
 		super().__init__(wxEVT_BOX_UPDATED, source.GetId())
 		self.SetEventObject(source)
 		self.boxes = boxes
+		self.boxes_changed = boxes_changed
 
 	def Clone(self) -> "BoxUpdatedEvent":
 		# wxPython uses this to copy events internally
-		return BoxUpdatedEvent(self.GetEventObject(), self.boxes) # type: ignore[arg-type]
+		return BoxUpdatedEvent(self.GetEventObject(), self.boxes, self.boxes_changed) # type: ignore[arg-type]
@@ -0,0 +1,17 @@
+import wx
+
+from events.events import wxEVT_FRAME_PREFETCHED
+
+
+class FramePrefetchedEvent(wx.CommandEvent):
+	index: int
+
+	"""Posted from the prefetch worker when a frame has been decoded into the cache."""
+	def __init__(self, source: wx.Window, index: int):
+		super().__init__(wxEVT_FRAME_PREFETCHED, source.GetId())
+		self.SetEventObject(source)
+		self.index = index
+
+	def Clone(self) -> "FramePrefetchedEvent":
+		# wxPython uses this to copy events internally
+		return FramePrefetchedEvent(self.GetEventObject(), self.index) # type: ignore[arg-type]
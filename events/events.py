@@ -8,6 +8,7 @@ wxEVT_BOX_LABEL_EDITED = wx.NewEventType()
 wxEVT_BOX_LABEL_REMOVE = wx.NewEventType()
 wxEVT_BOX_LABEL_REMOVED = wx.NewEventType()
 wxEVT_BOX_SELECTED = wx.NewEventType()
+wxEVT_FRAME_PREFETCHED = wx.NewEventType()
 
 # idEVT_BOX_ADDED = wx.NewId()
 # idEVT_BOX_REMOVED = wx.NewId()
@@ -28,3 +29,4 @@ EVT_BOX_LABEL_EDITED = wx.PyEventBinder(wxEVT_BOX_LABEL_EDITED, 1)
 EVT_BOX_LABEL_REMOVE = wx.PyEventBinder(wxEVT_BOX_LABEL_REMOVE, 1)
 EVT_BOX_LABEL_REMOVED = wx.PyEventBinder(wxEVT_BOX_LABEL_REMOVED, 1)
 EVT_BOX_SELECTED = wx.PyEventBinder(wxEVT_BOX_SELECTED, 1)
+EVT_FRAME_PREFETCHED = wx.PyEventBinder(wxEVT_FRAME_PREFETCHED, 1)
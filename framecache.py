@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+import numpy as np
+
+FrameIndex = int
+CacheKey = Hashable  # Usually a FrameIndex, or a tuple starting with one for derived images
+
+DEFAULT_CACHE_BYTES: int = 512 * 1024 * 1024  # 512MB of decoded frames
+DEFAULT_DISPLAY_CACHE_BYTES: int = 128 * 1024 * 1024  # 128MB of display-sized copies
+
+
+class FrameCache:
+    """LRU cache of decoded frames, bounded by the total number of bytes held. Safe to share between threads."""
+    __frames: OrderedDict[CacheKey, np.ndarray]
+    __max_bytes: int
+    __size_bytes: int
+    __lock: threading.Lock
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        if max_bytes <= 0:
+            raise ValueError("Cache byte budget must be positive")
+        self.__frames = OrderedDict()
+        self.__max_bytes = max_bytes
+        self.__size_bytes = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def max_bytes(self) -> int:
+        return self.__max_bytes
+
+    @property
+    def size_bytes(self) -> int:
+        """Get the number of bytes currently held by cached frames."""
+        return self.__size_bytes
+
+    def get(self, key: CacheKey) -> np.ndarray | None:
+        """Get a cached frame, marking it as most recently used."""
+        with self.__lock:
+            frame = self.__frames.get(key)
+            if frame is not None:
+                self.__frames.move_to_end(key)
+            return frame
+
+    def put(self, key: CacheKey, frame: np.ndarray) -> None:
+        """Cache a decoded frame, evicting least recently used frames to stay within budget."""
+        if frame.nbytes > self.__max_bytes:
+            # A single frame larger than the whole budget is never worth keeping
+            return
+        # Cached frames are shared between callers, so guard against in-place edits
+        frame.flags.writeable = False
+        with self.__lock:
+            self.__discard(key)
+            self.__frames[key] = frame
+            self.__size_bytes += frame.nbytes
+            while self.__size_bytes > self.__max_bytes:
+                _, evicted = self.__frames.popitem(last=False)
+                self.__size_bytes -= evicted.nbytes
+
+    def discard(self, key: CacheKey) -> None:
+        """Remove a frame from the cache if present."""
+        with self.__lock:
+            self.__discard(key)
+
+    def __discard(self, key: CacheKey) -> None:
+        frame = self.__frames.pop(key, None)
+        if frame is not None:
+            self.__size_bytes -= frame.nbytes
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__frames.clear()
+            self.__size_bytes = 0
+
+    def __contains__(self, key: CacheKey) -> bool:
+        with self.__lock:
+            return key in self.__frames
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return len(self.__frames)
@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+
+from framecache import FrameCache
+
+
+def make_frame(value: int, size: int = 10) -> np.ndarray:
+    return np.full((size, size, 3), value, dtype=np.uint8)
+
+
+class TestFrameCache(unittest.TestCase):
+    def test_get_returns_cached_frame(self):
+        cache = FrameCache(max_bytes=10_000)
+        frame = make_frame(1)
+        cache.put(5, frame)
+        self.assertIs(cache.get(5), frame)
+        self.assertIsNone(cache.get(6))
+        self.assertIn(5, cache)
+
+    def test_evicts_least_recently_used_when_over_budget(self):
+        frame_bytes = make_frame(0).nbytes
+        cache = FrameCache(max_bytes=frame_bytes * 2)
+        cache.put(0, make_frame(0))
+        cache.put(1, make_frame(1))
+        cache.get(0)  # 1 is now the least recently used
+        cache.put(2, make_frame(2))
+        self.assertIn(0, cache)
+        self.assertNotIn(1, cache)
+        self.assertIn(2, cache)
+        self.assertEqual(cache.size_bytes, frame_bytes * 2)
+
+    def test_replacing_frame_does_not_double_count(self):
+        cache = FrameCache(max_bytes=10_000)
+        cache.put(0, make_frame(0))
+        cache.put(0, make_frame(1))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.size_bytes, make_frame(0).nbytes)
+
+    def test_frame_larger_than_budget_is_not_cached(self):
+        cache = FrameCache(max_bytes=10)
+        cache.put(0, make_frame(0))
+        self.assertNotIn(0, cache)
+        self.assertEqual(cache.size_bytes, 0)
+
+    def test_cached_frames_are_read_only(self):
+        cache = FrameCache(max_bytes=10_000)
+        cache.put(0, make_frame(0))
+        with self.assertRaises(ValueError):
+            cache.get(0)[0, 0, 0] = 1
+
+
+if __name__ == '__main__':
+    unittest.main()
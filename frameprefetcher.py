@@ -0,0 +1,93 @@
+import threading
+from typing import Callable
+
+import numpy as np
+
+from framecache import FrameIndex
+from logutil import getLog
+
+DEFAULT_PREFETCH_AHEAD: int = 8
+DEFAULT_PREFETCH_BEHIND: int = 2
+
+
+class FramePrefetcher(threading.Thread):
+    """Background worker that decodes frames around the current index into the shared frame caches."""
+    __decode: Callable[[FrameIndex], np.ndarray | None]
+    __is_ready: Callable[[FrameIndex], bool]
+    __num_frames: int
+    __on_frame_ready: Callable[[FrameIndex], None]
+    __ahead: int
+    __behind: int
+    __condition: threading.Condition
+    __requested: FrameIndex | None
+    __stopped: bool
+
+    def __init__(
+        self,
+        decode: Callable[[FrameIndex], np.ndarray | None],
+        is_ready: Callable[[FrameIndex], bool],
+        num_frames: int,
+        on_frame_ready: Callable[[FrameIndex], None],
+        ahead: int = DEFAULT_PREFETCH_AHEAD,
+        behind: int = DEFAULT_PREFETCH_BEHIND
+    ):
+        super().__init__(name='FramePrefetcher', daemon=True)
+        self.__decode = decode
+        self.__is_ready = is_ready
+        self.__num_frames = num_frames
+        self.__on_frame_ready = on_frame_ready
+        self.__ahead = ahead
+        self.__behind = behind
+        self.__condition = threading.Condition()
+        self.__requested = None
+        self.__stopped = False
+
+    def prefetch_around(self, index: FrameIndex) -> None:
+        """Ask the worker to decode the window around index, abandoning any older request."""
+        with self.__condition:
+            self.__requested = index
+            self.__condition.notify()
+
+    def stop(self) -> None:
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify()
+
+    def prefetch_order(self, index: FrameIndex) -> list[FrameIndex]:
+        """Frames to decode for a request at index, in the order they should be decoded."""
+        ahead = range(index, min(index + self.__ahead + 1, self.__num_frames))
+        # Decode the frames behind in ascending order so the decoder reads forward after one seek
+        behind = range(max(0, index - self.__behind), index)
+        return list(ahead) + list(behind)
+
+    def __next_request(self) -> FrameIndex | None:
+        with self.__condition:
+            while not self.__stopped and self.__requested is None:
+                self.__condition.wait()
+            if self.__stopped:
+                return None
+            index = self.__requested
+            self.__requested = None
+            return index
+
+    def __is_superseded(self) -> bool:
+        with self.__condition:
+            return self.__stopped or self.__requested is not None
+
+    def run(self) -> None:
+        while True:
+            index = self.__next_request()
+            if index is None:
+                return
+            for frame_index in self.prefetch_order(index):
+                if self.__is_superseded():
+                    break
+                if self.__is_ready(frame_index):
+                    continue
+                try:
+                    frame = self.__decode(frame_index)
+                except Exception as e:
+                    getLog().error(f'Error prefetching frame {frame_index}: {e}')
+                    break
+                if frame is not None:
+                    self.__on_frame_ready(frame_index)
@@ -0,0 +1,51 @@
+import threading
+import unittest
+
+import numpy as np
+
+from framecache import FrameCache
+from frameprefetcher import FramePrefetcher
+
+
+class TestFramePrefetcher(unittest.TestCase):
+    def setUp(self):
+        self.cache = FrameCache(max_bytes=1_000_000)
+        self.decoded: list[int] = []
+        self.ready = threading.Event()
+
+    def decode(self, index: int) -> np.ndarray:
+        self.decoded.append(index)
+        frame = np.full((4, 4, 3), index, dtype=np.uint8)
+        self.cache.put(index, frame)
+        return frame
+
+    def on_frame_ready(self, index: int) -> None:
+        if index == 4:  # Last frame decoded for the request
+            self.ready.set()
+
+    def test_prefetch_order_reads_ahead_then_behind_ascending(self):
+        prefetcher = FramePrefetcher(self.decode, self.cache.__contains__, 10, self.on_frame_ready, ahead=3, behind=2)
+        self.assertEqual(prefetcher.prefetch_order(5), [5, 6, 7, 8, 3, 4])
+
+    def test_prefetch_order_is_clamped_to_video(self):
+        prefetcher = FramePrefetcher(self.decode, self.cache.__contains__, 10, self.on_frame_ready, ahead=3, behind=2)
+        self.assertEqual(prefetcher.prefetch_order(8), [8, 9, 6, 7])
+        self.assertEqual(prefetcher.prefetch_order(0), [0, 1, 2, 3])
+
+    def test_worker_decodes_uncached_frames_into_cache(self):
+        self.cache.put(6, np.zeros((4, 4, 3), dtype=np.uint8))
+        prefetcher = FramePrefetcher(self.decode, self.cache.__contains__, 10, self.on_frame_ready, ahead=2, behind=2)
+        prefetcher.start()
+        try:
+            prefetcher.prefetch_around(5)
+            self.assertTrue(self.ready.wait(timeout=5))
+        finally:
+            prefetcher.stop()
+            prefetcher.join(timeout=5)
+        self.assertEqual(self.decoded, [5, 7, 3, 4])
+        for index in (3, 4, 5, 6, 7):
+            self.assertIn(index, self.cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
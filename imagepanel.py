@@ -1,24 +1,36 @@
+from collections import OrderedDict
+
+import cv2
 import numpy as np
 import wx
-import copy
 
 from FrameData import FrameData
-from boxdata import BoxData
+from boxdata import BoxData, TagLabel
+from boxhistory import AddBox, BoxHistory, ChangeTags, FrameIndex, RemoveBox
+from boxindex import BoxGrid
 from events.BoxAddedEvent import BoxAddedEvent
 from events.BoxEditedEvent import BoxEditedEvent
+from events.BoxRemovedEvent import BoxRemovedEvent
 from events.BoxSelectedEvent import BoxSelectedEvent, BoxDeselectedEvent
 from events.BoxUpdatedEvent import BoxUpdatedEvent
 from events.events import wxEVT_BOX_SELECTED, EVT_BOX_SELECTED, EVT_BOX_EDITED
+from imageutil import ImageSize, Rect, RotationAngle, corners_to_rect, fit_to_size, rotated_size, union_rect
+from labellayout import LabelLayoutCache
 from logutil import getLog
 
-RotationAngle = int
-ImageSize = tuple[int, int] # (width, height)
-UserAction = str  # 'draw_box', 'rotate', etc.
+BitmapKey = tuple[int, RotationAngle, ImageSize]  # (frame index, rotation angle, target size)
+GridKey = tuple[int, int, RotationAngle, ImageSize, ImageSize]  # (box list id, box count, angle, image size, bitmap size)
+
+BITMAP_CACHE_SIZE: int = 32  # Number of scaled bitmaps kept for revisiting frames and sizes
+LABEL_HEIGHT: int = 18  # Pixels of the label strip along the bottom edge of each box
+DRAG_PEN_WIDTH: int = 2
 
 class ImagePanel(wx.Panel, wx.PyEventBinder):
     image: np.ndarray | None
     bitmap: wx.Bitmap | None
     __boxes: list[BoxData]
+    frame_index: FrameIndex  # Frame the boxes belong to, which their edits are recorded against
+    read_only: bool  # Boxes are shown but cannot be selected, drawn or deleted
     __frame_data: FrameData
     _selected_box: BoxData | None = None
     dragging: bool
@@ -28,14 +40,27 @@ class ImagePanel(wx.Panel, wx.PyEventBinder):
     img_size: ImageSize
     bmp_size: ImageSize
     rotation_angle: RotationAngle
-    undo_stack: list[tuple[UserAction, RotationAngle, list[BoxData]] | tuple[UserAction, list[BoxData]]]
-    redo_stack: list[tuple[UserAction, RotationAngle, list[BoxData]] | tuple[UserAction, list[BoxData]]]
+    __bitmap_cache: OrderedDict[BitmapKey, tuple[wx.Bitmap, ImageSize]]
+    __resize_buffer: np.ndarray | None
+    __box_grid: BoxGrid | None  # Hit-testing grid of the boxes' bitmap rects, built on the first click
+    __box_grid_key: GridKey | None
+    __label_font: wx.Font
+    __pens: dict[tuple[str | None, int], wx.Pen]  # By box source and stroke width
+    __brushes: dict[str | None, wx.Brush]  # By box source
+    __drag_pen: wx.Pen
+    __label_layouts: LabelLayoutCache
+    __backing: wx.Bitmap | None  # The frame and its boxes as last painted, under the drag overlay
+    __backing_valid: bool
+    __drag_dirty: Rect | None  # Panel area the drag overlay was last refreshed in
+    history: BoxHistory  # Usually shared with the frame, so it spans every frame
 
     def __init__(self, parent: wx.Window):
         super().__init__(parent)
         self.image = None
         self.bitmap = None
         self.__boxes = []
+        self.frame_index = 0
+        self.read_only = False
         self.dragging = False
         self.start_pos = None
         self.end_pos = None
@@ -43,60 +68,107 @@ class ImagePanel(wx.Panel, wx.PyEventBinder):
         self.img_size = (0, 0)
         self.bmp_size = (0, 0)
         self.rotation_angle = 0
+        self.__bitmap_cache = OrderedDict()
+        self.__resize_buffer = None
+        self.__box_grid = None
+        self.__box_grid_key = None
+        # Paint resources are made once rather than for every box on every paint
+        self.__label_font = wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL)
+        self.SetFont(self.__label_font)  # Labels are measured with the panel's own font
+        self.__pens = {}
+        self.__brushes = {}
+        self.__drag_pen = wx.Pen(wx.BLUE, DRAG_PEN_WIDTH, wx.PENSTYLE_DOT)
+        self.__label_layouts = LabelLayoutCache(lambda text: self.GetTextExtent(text)[0])
+        self.__backing = None
+        self.__backing_valid = False
+        self.__drag_dirty = None
         self.Bind(wx.EVT_PAINT, self.on_paint)
         self.Bind(wx.EVT_LEFT_DOWN, self.on_left_down)
         self.Bind(wx.EVT_LEFT_UP, self.on_left_up)
         self.Bind(wx.EVT_MOTION, self.on_motion)
         self.Bind(EVT_BOX_EDITED, self.__on_box_edited)
-        self.undo_stack = []
-        self.redo_stack = []
+        self.history = BoxHistory()
 
         self.SetBackgroundStyle(wx.BG_STYLE_PAINT)
 
-    def set_image(self, img: np.ndarray, rotation_angle: int = 0) -> None:
+    def set_image(
+        self,
+        img: np.ndarray,
+        rotation_angle: int = 0,
+        source_size: ImageSize | None = None,
+        cache_key: BitmapKey | None = None
+    ) -> None:
+        """Display an RGB image. If source_size is given, img is an already scaled proxy of an image that size.
+
+        If cache_key is given the scaled bitmap is kept so show_cached_image can redisplay it.
+        """
         self.image = img
-        self.rotation_angle = rotation_angle
         h, w = img.shape[:2]
-        panel_size = self.GetSize()
-        max_w, max_h = panel_size.GetWidth(), panel_size.GetHeight()
-        scale = min(max_w / w, max_h / h, 1)
-        new_w, new_h = int(w * scale), int(h * scale)
-        import cv2
-        img_resized = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_AREA)
-        import wx
-        wx_img = wx.Image(new_w, new_h)
-
-        # img_rgb: np.ndarray = cv2.cvtColor(img_resized, cv2.COLOR_BGR2RGB)
-        # wx_img: wx.Image = wx.Image(new_w, new_h)
-        # wx_img.SetData(img_rgb.tobytes())
-
-        wx_img.SetData(img_resized.tobytes())
-        self.bitmap = wx_img.ConvertToBitmap()
-        self.img_size = (w, h)
-        self.bmp_size = (new_w, new_h)
-        self.scale = scale
+        if source_size is None:
+            panel_size = self.GetSize()
+            (new_w, new_h), _ = fit_to_size((w, h), (panel_size.GetWidth(), panel_size.GetHeight()))
+            img_resized = self.__resize_into_buffer(img, (new_w, new_h))
+            source_size = (w, h)
+        else:
+            new_w, new_h = w, h
+            img_resized = img
+
+        # Build the bitmap straight from the pixel buffer rather than going through
+        # tobytes() and wx.Image, which would copy the frame twice more.
+        bitmap = wx.Bitmap.FromBuffer(new_w, new_h, np.ascontiguousarray(img_resized))
+        if cache_key is not None:
+            self.__bitmap_cache[cache_key] = (bitmap, source_size)
+            self.__bitmap_cache.move_to_end(cache_key)
+            while len(self.__bitmap_cache) > BITMAP_CACHE_SIZE:
+                self.__bitmap_cache.popitem(last=False)
+        self.__show_bitmap(bitmap, rotation_angle, source_size)
+
+    def __resize_into_buffer(self, img: np.ndarray, size: ImageSize) -> np.ndarray:
+        """Resize img into a destination buffer that is reused while the target size stays the same."""
+        w, h = size
+        if img.shape[1] == w and img.shape[0] == h:
+            return img
+        buffer = self.__resize_buffer
+        if buffer is None or buffer.shape != (h, w) + img.shape[2:] or buffer.dtype != img.dtype:
+            buffer = np.empty((h, w) + img.shape[2:], dtype=img.dtype)
+            self.__resize_buffer = buffer
+        return cv2.resize(img, (w, h), dst=buffer, interpolation=cv2.INTER_AREA)
+
+    def show_cached_image(self, cache_key: BitmapKey) -> bool:
+        """Redisplay a bitmap previously passed to set_image with cache_key, if it is still cached."""
+        entry = self.__bitmap_cache.get(cache_key)
+        if entry is None:
+            return False
+        self.__bitmap_cache.move_to_end(cache_key)
+        bitmap, source_size = entry
+        self.__show_bitmap(bitmap, cache_key[1], source_size)
+        return True
+
+    def clear_image_cache(self) -> None:
+        self.__bitmap_cache.clear()
+
+    def __show_bitmap(self, bitmap: wx.Bitmap, rotation_angle: RotationAngle, source_size: ImageSize) -> None:
+        self.bitmap = bitmap
+        self.rotation_angle = rotation_angle
+        self.img_size = source_size
+        self.bmp_size = (bitmap.GetWidth(), bitmap.GetHeight())
+        self.scale = self.bmp_size[0] / source_size[0]
         self.Refresh()
 
     def rotate_boxes(self, new_angle: int) -> None:
-        # Store undo state
-        self.undo_stack.append(('rotate', self.rotation_angle, copy.deepcopy(self.__boxes)))
-        self.redo_stack.clear()
-
         # Only update the rotation angle
         self.rotation_angle = new_angle
 
-        # Trigger box update event and refresh
-        update_event = BoxUpdatedEvent(self, self.__boxes)
+        # Trigger box update event and refresh. No box changed, so there is nothing to save.
+        update_event = BoxUpdatedEvent(self, self.__boxes, boxes_changed=False)
         wx.PostEvent(self, update_event)
         self.Refresh()
 
     def get_image_offset(self) -> tuple[int, int]:
-        """Return the (x, y) offset of the image inside the panel, accounting for rotation."""
+        """Return the (x, y) offset of the image inside the panel. The bitmap is already rotated."""
         panel_w: int = self.GetSize().GetWidth()
         panel_h: int = self.GetSize().GetHeight()
         bmp_w, bmp_h = self.bmp_size
-        if self.rotation_angle in (90, 270):
-            bmp_w, bmp_h = bmp_h, bmp_w
         offset_x: int = (panel_w - bmp_w) // 2
         offset_y: int = (panel_h - bmp_h) // 2
         return offset_x, offset_y
@@ -110,23 +182,58 @@ class ImagePanel(wx.Panel, wx.PyEventBinder):
         return x_clamped, y_clamped
 
 
-    def point_in_box(self, point: wx.Point, box: BoxData) -> bool:
-        """Check if a wx.Point is inside the box (in bitmap coordinates)."""
-        x, y, w, h = box.coords
-        # Map image coordinates to bitmap coordinates
+    @property
+    def source_size(self) -> ImageSize:
+        """Get the (width, height) of the unrotated source image that box coordinates refer to."""
+        return rotated_size(self.img_size, self.rotation_angle)
+
+    def box_to_bitmap_rect(self, coords: tuple[int, int, int, int]) -> wx.Rect:
+        """Map box coordinates in the unrotated source image to a rect on the displayed bitmap."""
+        source_w, source_h = self.source_size
+        x, y, w, h = ImagePanel.rotate_point(
+            coords[0], coords[1], coords[2], coords[3], self.rotation_angle, source_w, source_h
+        )
         img_w, img_h = self.img_size
         bx, by = self.bmp_size
-        if self.rotation_angle in (90, 270):
-            img_w, img_h = img_h, img_w
-            bx, by = by, bx
         bmp_x1 = int(x / img_w * bx)
         bmp_y1 = int(y / img_h * by)
         bmp_x2 = int((x + w) / img_w * bx)
         bmp_y2 = int((y + h) / img_h * by)
-        rect = wx.Rect(bmp_x1, bmp_y1, bmp_x2 - bmp_x1, bmp_y2 - bmp_y1)
-        return rect.Contains(point)
+        return wx.Rect(bmp_x1, bmp_y1, bmp_x2 - bmp_x1, bmp_y2 - bmp_y1)
+
+    def bitmap_to_source_point(self, x: int, y: int) -> tuple[int, int]:
+        """Map a point on the displayed bitmap to coordinates in the unrotated source image."""
+        img_w, img_h = self.img_size
+        bx, by = self.bmp_size
+        rx: int = int(x / bx * img_w)
+        ry: int = int(y / by * img_h)
+        source_w, source_h = self.source_size
+        angle = self.rotation_angle % 360
+        if angle == 90:
+            return ry, source_h - rx
+        elif angle == 180:
+            return source_w - rx, source_h - ry
+        elif angle == 270:
+            return source_w - ry, rx
+        return rx, ry
+
+    def point_in_box(self, point: wx.Point, box: BoxData) -> bool:
+        """Check if a wx.Point is inside the box (in bitmap coordinates)."""
+        return self.box_to_bitmap_rect(box.coords).Contains(point)
+
+    def box_at(self, point: wx.Point) -> BoxData | None:
+        """Get the topmost box containing a point on the bitmap."""
+        key = (id(self.__boxes), len(self.__boxes), self.rotation_angle, self.img_size, self.bmp_size)
+        if self.__box_grid is None or key != self.__box_grid_key:
+            rects = [tuple(self.box_to_bitmap_rect(box.coords).Get()) for box in self.__boxes]
+            self.__box_grid = BoxGrid(rects)
+            self.__box_grid_key = key
+        i = self.__box_grid.hit(point.x, point.y)
+        return self.__boxes[i] if i is not None else None
 
     def on_left_down(self, event: wx.MouseEvent) -> None:
+        if self.read_only:
+            return
         mouse_pos: wx.Point = event.GetPosition()
         offset_x, offset_y = self.get_image_offset()
         img_x: int = mouse_pos.x - offset_x
@@ -135,15 +242,15 @@ class ImagePanel(wx.Panel, wx.PyEventBinder):
         click_point = wx.Point(img_x, img_y)
 
         # Check if click is inside any box
-        for box in self.__boxes:
-            if self.point_in_box(click_point, box):
-                getLog().debug(f"Selected box {self._selected_box}")
+        box = self.box_at(click_point)
+        if box is not None:
+            getLog().debug(f"Selected box {box}")
 
-                select_event = BoxSelectedEvent(self, box)
-                wx.PostEvent(self, select_event)
-                self.Refresh()
-                self._selected_box = box
-                return  # Do not start dragging
+            select_event = BoxSelectedEvent(self, box)
+            wx.PostEvent(self, select_event)
+            self.Refresh()
+            self._selected_box = box
+            return  # Do not start dragging
 
         if self._selected_box is not None:
             # Deselect the current box if clicking outside
@@ -154,6 +261,8 @@ class ImagePanel(wx.Panel, wx.PyEventBinder):
         self._selected_box = None
         self.dragging = True
         self.start_pos = click_point
+        self.end_pos = None
+        self.__drag_dirty = None
 
     def on_left_up(self, event: wx.MouseEvent) -> None:
         if self.dragging:
@@ -169,23 +278,13 @@ class ImagePanel(wx.Panel, wx.PyEventBinder):
             x2: int = self.end_pos.x
             y2: int = self.end_pos.y
 
-            def to_img_coords(x: int, y: int) -> tuple[int, int]:
-                bx: int = self.bmp_size[0]
-                by: int = self.bmp_size[1]
-                iw: int = self.img_size[0]
-                ih: int = self.img_size[1]
-                img_x: int = int(x / bx * iw)
-                img_y: int = int(y / by * ih)
-                return img_x, img_y
-
-            img_start: tuple[int, int] = to_img_coords(x1, y1)
-            img_end: tuple[int, int] = to_img_coords(x2, y2)
+            # Boxes are stored in unrotated source coordinates, so undo the display rotation
+            img_start: tuple[int, int] = self.bitmap_to_source_point(x1, y1)
+            img_end: tuple[int, int] = self.bitmap_to_source_point(x2, y2)
             coords: tuple[int, int, int, int] = (
-                img_start[0], img_start[1],
-                img_end[0] - img_start[0], img_end[1] - img_start[1]
+                min(img_start[0], img_end[0]), min(img_start[1], img_end[1]),
+                abs(img_end[0] - img_start[0]), abs(img_end[1] - img_start[1])
             )
-            self.undo_stack.append(('draw_box', copy.deepcopy(self.__boxes)))
-            self.redo_stack.clear()
             self.add_new_box(coords, 'user')
             self.dragging = False
 
@@ -197,17 +296,32 @@ class ImagePanel(wx.Panel, wx.PyEventBinder):
             img_y: int = mouse_pos.y - offset_y
             img_x, img_y = self.clamp_to_image(img_x, img_y)
             self.end_pos = wx.Point(img_x, img_y)
-            self.Refresh()
 
-    def _is_box_selected(self, box: BoxData) -> bool:
-        if self._selected_box is None:
-            return False
-        """Check if the box is currently selected."""
+            # Only the area under the old and new overlay is repainted, from the backing bitmap
+            dirty = corners_to_rect(*self.__drag_corners(), margin=DRAG_PEN_WIDTH + 1)
+            previous, self.__drag_dirty = self.__drag_dirty, dirty
+            if previous is not None:
+                dirty = union_rect(previous, dirty)
+            # Through super() so the backing bitmap is kept
+            super().Refresh(False, wx.Rect(*dirty))
+
+    def __drag_corners(self) -> tuple[tuple[int, int], tuple[int, int]]:
+        """Get the corners of the box being dragged out, in panel coordinates."""
+        offset_x, offset_y = self.get_image_offset()
+        return (
+            (self.start_pos.x + offset_x, self.start_pos.y + offset_y),
+            (self.end_pos.x + offset_x, self.end_pos.y + offset_y)
+        )
 
-        if self._selected_box == box or self._selected_box.coords == box.coords:
-            return True
+    def Refresh(self, eraseBackground: bool = True, rect: wx.Rect | None = None) -> None:
+        """Repaint the frame and its boxes, not just the drag overlay."""
+        self.__backing_valid = False
+        super().Refresh(eraseBackground, rect)
 
-        return False
+    def _is_box_selected(self, box: BoxData) -> bool:
+        """Check if the box is currently selected."""
+        # Undo keeps the same box objects, so the selection never needs matching by coordinates
+        return self._selected_box is box
 
     @staticmethod
     def get_box_label_text(box: BoxData) -> str:
@@ -217,31 +331,31 @@ class ImagePanel(wx.Panel, wx.PyEventBinder):
 
     def on_paint(self, event: wx.PaintEvent):
         dc = wx.BufferedPaintDC(self)
+        size = self.GetClientSize()
+        if not self.__backing_valid or self.__backing is None or self.__backing.GetSize() != size:
+            self.__paint_backing(size)
+        dc.DrawBitmap(self.__backing, 0, 0)
+
+        # Draw current drag box
+        if self.bitmap and self.dragging and self.start_pos and self.end_pos:
+            dc.SetPen(self.__drag_pen)
+            dc.SetBrush(wx.TRANSPARENT_BRUSH)
+            dc.DrawRectangle(wx.Rect(*corners_to_rect(*self.__drag_corners())))
+
+    def __paint_backing(self, size: wx.Size) -> None:
+        """Draw the frame and its boxes into the backing bitmap, which paints reuse until the next Refresh."""
+        if self.__backing is None or self.__backing.GetSize() != size:
+            self.__backing = wx.Bitmap(max(size.GetWidth(), 1), max(size.GetHeight(), 1))
+        dc = wx.MemoryDC(self.__backing)
+        dc.SetBackground(wx.Brush(self.GetBackgroundColour()))
         dc.Clear()
         if self.bitmap:
             offset_x, offset_y = self.get_image_offset()
             dc.DrawBitmap(self.bitmap, offset_x, offset_y)
-            # Swap image and bitmap dimensions for 90/270 degree rotations
-            img_w, img_h = self.img_size
-            bx, by = self.bmp_size
-            if self.rotation_angle in (90, 270):
-                img_w, img_h = img_h, img_w
-                bx, by = by, bx
             for box in self.__boxes:
-                self.paint_box(dc, box, offset_x, offset_y, img_w, img_h, bx, by)
-
-            # Draw current drag box
-            if self.dragging and self.start_pos and self.end_pos:
-                offset_x, offset_y = self.get_image_offset()
-                rect = wx.Rect(
-                    self.start_pos[0] + offset_x,
-                    self.start_pos[1] + offset_y,
-                    self.end_pos[0] - self.start_pos[0],
-                    self.end_pos[1] - self.start_pos[1]
-                )
-                dc.SetPen(wx.Pen(wx.BLUE, 2, wx.PENSTYLE_DOT))
-                dc.SetBrush(wx.TRANSPARENT_BRUSH)
-                dc.DrawRectangle(rect)
+                self.paint_box(dc, box, offset_x, offset_y)
+        dc.SelectObject(wx.NullBitmap)
+        self.__backing_valid = True
 
     # def to_original_image_coords(x: int, y: int) -> tuple[int, int]:
     #     bx, by = self.bmp_size
@@ -260,67 +374,47 @@ class ImagePanel(wx.Panel, wx.PyEventBinder):
     #     else:
     #         return img_x, img_y
 
-    def undo(self):
-        if not self.undo_stack:
-            return
-        action = self.undo_stack.pop()
-        getLog().debug(f'Actioned undo for {action[0]}')
-        if action[0] == 'draw_box':
-            self.redo_stack.append(('draw_box', copy.deepcopy(self.__boxes)))
-            self.__boxes = copy.deepcopy(action[1])
-            # box_removed_event = BoxRemovedEvent(self, box)
-            # wx.PostEvent(self, box_removed_event)
-        elif action[0] == 'rotate':
-            self.redo_stack.append(('rotate', self.rotation_angle, copy.deepcopy(self.__boxes)))
-            self.rotation_angle = action[1]
-            self.__boxes = copy.deepcopy(action[2])
-        update_event = BoxUpdatedEvent(self, self.__boxes)
-        wx.PostEvent(self, update_event)
-        self.Refresh()
-
     def add_new_box(self, coords: tuple[int, int, int, int], source: str = 'user') -> None:
         """Add a new box with the given coordinates."""
         box_number = len(self.__boxes) + 1
         new_box_label = f"unknown-{box_number}"
         new_box = BoxData(coords, [new_box_label], source)
         self.__boxes.append(new_box)
+        self.__box_grid = None
+        self.history.record(self.frame_index, AddBox(new_box, len(self.__boxes) - 1))
         box_added_event = BoxAddedEvent(self, new_box)
         getLog().info(f'New box added: {new_box}, {box_added_event}')
         wx.PostEvent(self, box_added_event)
         self.Refresh()
 
-    def redo(self):
-        if not self.redo_stack:
-            return
-        action = self.redo_stack.pop()
-        getLog().debug(f'Actioned redo for {action[0]}')
-        if action[0] == 'draw_box':
-            self.undo_stack.append(('draw_box', copy.deepcopy(self.__boxes)))
-            self.__boxes = copy.deepcopy(action[1])
-        elif action[0] == 'rotate':
-            self.undo_stack.append(('rotate', self.rotation_angle, copy.deepcopy(self.__boxes)))
-            self.rotation_angle = action[1]
-            self.__boxes = copy.deepcopy(action[2])
-        self.Refresh()
-
     def on_delete_box(self, box: BoxData) -> None:
-        if box in self.__boxes:
-            self.undo_stack.append(("delete_box", copy.deepcopy(self.__boxes)))
-            self.__boxes.remove(box)
+        if not self.read_only and box in self.__boxes:
+            index = self.__boxes.index(box)
+            del self.__boxes[index]
+            self.__box_grid = None
+            self.history.record(self.frame_index, RemoveBox(box, index))
+            wx.PostEvent(self, BoxRemovedEvent(self, box))
             self.Refresh()  # Redraw the image panel
 
     def on_add_tag(self, box: BoxData, tag_number: int, tag: str) -> None:
         if box in self.__boxes and tag not in box.tags:
-            self.undo_stack.append(("add_tag", copy.deepcopy(self.__boxes)))
+            old_tags = list(box.tags)
             box.tags.append(tag)
+            self.record_tags_changed(box, old_tags)
             self.Refresh()
 
     def on_remove_tag(self, box: BoxData, tag_number: int, tag: str) -> None:
         if box in self.__boxes and tag in box.tags:
-            self.undo_stack.append(("remove_tag", copy.deepcopy(self.__boxes)))
+            old_tags = list(box.tags)
             box.tags.remove(tag)
+            self.record_tags_changed(box, old_tags)
             self.Refresh()
 
+    def record_tags_changed(self, box: BoxData, old_tags: list[TagLabel]) -> None:
+        """Record that box's tags were edited from old_tags, so the edit can be undone."""
+        if old_tags != box.tags and any(b is box for b in self.__boxes):
+            self.history.record(self.frame_index, ChangeTags(box, old_tags, box.tags))
+
     def __on_box_edited(self, event: BoxEditedEvent) -> None:
         """Handle box edited event."""
         getLog().info(f'Box {event.box} edited in {event.GetEventObject()}')
@@ -333,15 +427,26 @@ class ImagePanel(wx.Panel, wx.PyEventBinder):
 
     @boxes.setter
     def boxes(self, new_boxes: list[BoxData]) -> None:
-        """Set the list of boxes and clear undo/redo stacks."""
+        """Set the list of boxes."""
         if new_boxes is None:
             new_boxes = []
         else:
             self.__boxes = new_boxes
+            self.__box_grid = None
+            if self._selected_box is not None and not any(box is self._selected_box for box in new_boxes):
+                self._selected_box = None
         getLog().debug(f'Setting {len(new_boxes)} boxes in ImagePanel mutator')
 
         self.Refresh()  # Redraw the image panel
 
+    def set_frame_boxes(self, index: FrameIndex, boxes: list[BoxData], read_only: bool = False) -> None:
+        """Show the boxes of frame index, recording edits to them against that frame unless read_only."""
+        self.frame_index = index
+        self.read_only = read_only
+        if read_only:
+            self.dragging = False
+        self.boxes = boxes
+
     @staticmethod
     def rotate_point(x: int, y: int, w: int, h: int, angle, orig_w, orig_h):
         if angle == 90:
@@ -353,74 +458,56 @@ class ImagePanel(wx.Panel, wx.PyEventBinder):
         else:
             return x, y, w, h
 
+    @staticmethod
+    def box_colour(source: str | None) -> wx.Colour:
+        if source == 'user':
+            return wx.RED
+        elif source == 'automatic':
+            return wx.BLUE
+        return wx.YELLOW
+
+    def __box_pen(self, source: str | None, stroke_width: int) -> wx.Pen:
+        pen = self.__pens.get((source, stroke_width))
+        if pen is None:
+            pen = wx.Pen(self.box_colour(source), stroke_width)
+            self.__pens[(source, stroke_width)] = pen
+        return pen
+
+    def __box_brush(self, source: str | None) -> wx.Brush:
+        brush = self.__brushes.get(source)
+        if brush is None:
+            brush = wx.Brush(self.box_colour(source))
+            self.__brushes[source] = brush
+        return brush
+
     def paint_box(
         self,
         dc: wx.DC,
         box: BoxData,
         offset_x: int,
-        offset_y: int,
-        img_w: int,
-        img_h: int,
-        bx: int,
-        by: int
+        offset_y: int
     ) -> None:
         # Check if the box is selected
-        is_selected = self._selected_box is not None and self._is_box_selected(box)
-        coords = box.coords  # (x, y, w, h) in original image space
+        is_selected = self._is_box_selected(box)
 
-        # Use original image size for rotation
-        x, y, w, h = ImagePanel.rotate_point(
-                         coords[0], coords[1], coords[2], coords[3],
-                         self.rotation_angle,
-                         self.img_size[0], self.img_size[1]
-                    )
-
-        # Map image coordinates to bitmap coordinates using swapped dimensions
-        bmp_x1 = int(x / img_w * bx)
-        bmp_y1 = int(y / img_h * by)
-        bmp_x2 = int((x + w) / img_w * bx)
-        bmp_y2 = int((y + h) / img_h * by)
-
-        rect = wx.Rect(bmp_x1 + offset_x, bmp_y1 + offset_y, bmp_x2 - bmp_x1, bmp_y2 - bmp_y1)
+        # Box coords are in unrotated source image space
+        bmp_rect = self.box_to_bitmap_rect(box.coords)
+        rect = wx.Rect(bmp_rect.x + offset_x, bmp_rect.y + offset_y, bmp_rect.width, bmp_rect.height)
         stroke_width = 3 if is_selected else 1
 
         # Draw label area at the bottom edge
         label_text = self.get_box_label_text(box) or ""
-        label_rect_height = 18  # px, adjust as needed
-        label_rect = wx.Rect(
-            bmp_x1 + offset_x,
-            bmp_y2 + offset_y - label_rect_height,
-            bmp_x2 - bmp_x1,
-            label_rect_height
-        )
+        label_rect = wx.Rect(rect.x, rect.y + rect.height - LABEL_HEIGHT, rect.width, LABEL_HEIGHT)
 
-        if label_text.startswith("unknown-"):
-            getLog().debug(f'Painting {box} with unknown label.')
-        else:
-            getLog().debug(f'Painting box {box}')
-
-        colour: wx.Colour
-        if box.source == 'user':
-            colour = wx.RED
-        elif box.source == 'automatic':
-            colour = wx.BLUE
-        else:
-            colour = wx.YELLOW
-        dc.SetPen(wx.Pen(colour, stroke_width))
+        dc.SetPen(self.__box_pen(box.source, stroke_width))
         dc.SetBrush(wx.TRANSPARENT_BRUSH)
         dc.DrawRectangle(rect)
 
         # Truncate text to fit box width
-        dc.SetBrush(wx.Brush(colour))
-        font = wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL)
-        dc.SetFont(font)
+        dc.SetBrush(self.__box_brush(box.source))
+        dc.SetFont(self.__label_font)
         dc.SetTextForeground(wx.WHITE)
-        max_width = label_rect.GetWidth() - 4
-        truncated_text = label_text
-        while dc.GetTextExtent(truncated_text)[0] > max_width and len(truncated_text) > 0:
-            truncated_text = truncated_text[:-1]
-        if truncated_text != label_text and len(truncated_text) > 3:
-            truncated_text = truncated_text[:-3] + "..."
+        truncated_text = self.__label_layouts.truncated(label_text, label_rect.GetWidth() - 4)
 
         dc.DrawRectangle(label_rect)
-        dc.DrawText(truncated_text, label_rect.x + 2, label_rect.y + 2)
\ No newline at end of file
+        dc.DrawText(truncated_text, label_rect.x + 2, label_rect.y + 2)
@@ -1,4 +1,5 @@
 import cv2
+import numpy as np
 import os
 
 from scrubberframe import ScrubberFrame
@@ -9,17 +10,10 @@ class ImageScrubber(ScrubberFrame):
         self.image_files.sort()
         self.image_dir = image_dir
         super().__init__(parent, title, len(self.image_files))
+        self.start_prefetcher()
 
-    def get_frame(self, index: int, rotation_angle: int = 0):
+    def decode_frame(self, index: int) -> np.ndarray | None:
         if not self.image_files:
             return None
         img_path = os.path.join(self.image_dir, self.image_files[index])
-        img = cv2.imread(img_path)
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        if rotation_angle % 360 == 90:
-            img = cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
-        elif rotation_angle % 360 == 180:
-            img = cv2.rotate(img, cv2.ROTATE_180)
-        elif rotation_angle % 360 == 270:
-            img = cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
-        return img
\ No newline at end of file
+        return cv2.imread(img_path)
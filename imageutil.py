@@ -0,0 +1,59 @@
+import cv2
+import numpy as np
+
+RotationAngle = int
+ImageSize = tuple[int, int]  # (width, height)
+Rect = tuple[int, int, int, int]  # (x, y, width, height)
+
+
+def rotated_size(size: ImageSize, rotation_angle: RotationAngle) -> ImageSize:
+    """Get the (width, height) of an image of the given size after rotating it."""
+    if rotation_angle % 360 in (90, 270):
+        return size[1], size[0]
+    return size
+
+
+def fit_to_size(size: ImageSize, max_size: ImageSize) -> tuple[ImageSize, float]:
+    """Scale size down (never up) to fit within max_size, returning the new size and scale."""
+    w, h = size
+    max_w, max_h = max_size
+    scale = min(max_w / w, max_h / h, 1)
+    return (int(w * scale), int(h * scale)), scale
+
+
+def rotate_image(img: np.ndarray, rotation_angle: RotationAngle) -> np.ndarray:
+    """Rotate an image clockwise by a multiple of 90 degrees."""
+    if rotation_angle % 360 == 90:
+        return cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
+    elif rotation_angle % 360 == 180:
+        return cv2.rotate(img, cv2.ROTATE_180)
+    elif rotation_angle % 360 == 270:
+        return cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return img
+
+
+def make_display_proxy(img: np.ndarray, rotation_angle: RotationAngle, max_size: ImageSize) -> np.ndarray:
+    """Make a rotated RGB copy of a BGR frame scaled to fit max_size.
+
+    The frame is shrunk before colour conversion and rotation, so their cost depends on the
+    display size rather than the source resolution.
+    """
+    h, w = img.shape[:2]
+    (new_w, new_h), _ = fit_to_size(rotated_size((w, h), rotation_angle), max_size)
+    unrotated_w, unrotated_h = rotated_size((new_w, new_h), rotation_angle)
+    if (unrotated_w, unrotated_h) != (w, h):
+        img = cv2.resize(img, (max(1, unrotated_w), max(1, unrotated_h)), interpolation=cv2.INTER_AREA)
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return rotate_image(img, rotation_angle)
+
+
+def corners_to_rect(start: tuple[int, int], end: tuple[int, int], margin: int = 0) -> Rect:
+    """Get the rect spanning two corner points in any order, grown by margin on every side."""
+    x, y = min(start[0], end[0]), min(start[1], end[1])
+    return x - margin, y - margin, abs(end[0] - start[0]) + 2 * margin, abs(end[1] - start[1]) + 2 * margin
+
+
+def union_rect(a: Rect, b: Rect) -> Rect:
+    """Get the smallest rect covering both rects."""
+    x, y = min(a[0], b[0]), min(a[1], b[1])
+    return x, y, max(a[0] + a[2], b[0] + b[2]) - x, max(a[1] + a[3], b[1] + b[3]) - y
@@ -0,0 +1,40 @@
+import unittest
+
+import numpy as np
+
+from imageutil import corners_to_rect, fit_to_size, make_display_proxy, rotate_image, rotated_size, union_rect
+
+
+class TestImageUtil(unittest.TestCase):
+    def test_fit_to_size_never_scales_up(self):
+        self.assertEqual(fit_to_size((100, 50), (400, 400)), ((100, 50), 1))
+        self.assertEqual(fit_to_size((400, 200), (100, 100)), ((100, 50), 0.25))
+
+    def test_rotated_size(self):
+        self.assertEqual(rotated_size((40, 30), 90), (30, 40))
+        self.assertEqual(rotated_size((40, 30), 180), (40, 30))
+
+    def test_rotate_image_clockwise(self):
+        img = np.arange(6, dtype=np.uint8).reshape(2, 3)
+        self.assertTrue(np.array_equal(rotate_image(img, 90), np.rot90(img, k=-1)))
+        self.assertIs(rotate_image(img, 0), img)
+
+    def test_display_proxy_is_scaled_rotated_rgb(self):
+        bgr = np.zeros((200, 400, 3), dtype=np.uint8)
+        bgr[:, :, 0] = 255  # Blue in BGR
+        proxy = make_display_proxy(bgr, 90, (100, 100))
+        self.assertEqual(proxy.shape, (100, 50, 3))
+        self.assertTrue(np.all(proxy[:, :, 2] == 255))  # Blue in RGB
+        self.assertTrue(np.all(proxy[:, :, 0] == 0))
+
+    def test_corners_to_rect_in_any_order(self):
+        self.assertEqual(corners_to_rect((10, 40), (30, 20)), (10, 20, 20, 20))
+        self.assertEqual(corners_to_rect((30, 20), (10, 40), margin=3), (7, 17, 26, 26))
+
+    def test_union_rect(self):
+        self.assertEqual(union_rect((0, 0, 10, 10), (5, 20, 10, 5)), (0, 0, 15, 25))
+        self.assertEqual(union_rect((5, 5, 1, 1), (0, 0, 20, 20)), (0, 0, 20, 20))
+
+
+if __name__ == '__main__':
+    unittest.main()
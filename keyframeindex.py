@@ -0,0 +1,114 @@
+import json
+import os
+from bisect import bisect_left, bisect_right
+
+import cv2
+
+from logutil import getLog
+
+FrameIndex = int
+
+
+def create_keyframe_index_name_from_filename(file_name: str) -> str:
+    """Return the filename with its extension replaced by .keyframes.json, alongside the box data file."""
+    base, _ = os.path.splitext(file_name)
+    return base + ".keyframes.json"
+
+
+class KeyframeIndex:
+    """Sorted list of the keyframe positions in a video, used to pick cheap seek targets."""
+    __keyframes: list[FrameIndex]
+    __video_size: int | None
+
+    def __init__(self, keyframes: list[FrameIndex], video_size: int | None = None):
+        self.__keyframes = sorted(set(keyframes))
+        if not self.__keyframes or self.__keyframes[0] != 0:
+            # The first frame of a video is always decodable without a seek
+            self.__keyframes.insert(0, 0)
+        self.__video_size = video_size
+
+    @property
+    def keyframes(self) -> list[FrameIndex]:
+        return self.__keyframes
+
+    @property
+    def video_size(self) -> int | None:
+        """Size in bytes of the video the index was built from, used to detect stale index files."""
+        return self.__video_size
+
+    def keyframe_at_or_before(self, index: FrameIndex) -> FrameIndex:
+        """Get the keyframe a decoder has to start from to reach index."""
+        position = bisect_right(self.__keyframes, index)
+        return self.__keyframes[max(0, position - 1)]
+
+    def keyframe_after(self, index: FrameIndex) -> FrameIndex | None:
+        """Get the first keyframe strictly after index, if any."""
+        position = bisect_right(self.__keyframes, index)
+        if position < len(self.__keyframes):
+            return self.__keyframes[position]
+        return None
+
+    def nearest_keyframe(self, index: FrameIndex) -> FrameIndex:
+        """Get the keyframe closest to index in either direction."""
+        before = self.keyframe_at_or_before(index)
+        after = self.keyframe_after(index)
+        if after is not None and after - index < index - before:
+            return after
+        return before
+
+    def in_same_gop(self, first: FrameIndex, second: FrameIndex) -> bool:
+        """Check whether no keyframe separates the two frames, so one can be reached by reading forward."""
+        return self.keyframe_at_or_before(first) == self.keyframe_at_or_before(second)
+
+    def keyframes_in_range(self, start: FrameIndex, end: FrameIndex) -> list[FrameIndex]:
+        """Get the keyframes within [start, end)."""
+        return self.__keyframes[bisect_left(self.__keyframes, start):bisect_left(self.__keyframes, end)]
+
+    def save(self, filename: str) -> None:
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump({"video_size": self.__video_size, "keyframes": self.__keyframes}, f)
+
+    @staticmethod
+    def load(filename: str) -> "KeyframeIndex":
+        with open(filename, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return KeyframeIndex([int(k) for k in data["keyframes"]], data.get("video_size"))
+
+    @staticmethod
+    def build(video_path: str) -> "KeyframeIndex":
+        """Scan the video's packets for keyframes. Packets are demuxed but never decoded."""
+        cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG)
+        try:
+            if not cap.isOpened():
+                raise ValueError(f"Could not open video file {video_path}")
+            if not cap.set(cv2.CAP_PROP_FORMAT, -1):
+                raise ValueError("Keyframe detection needs raw packet access from the FFmpeg backend")
+            keyframes: list[FrameIndex] = []
+            frame_number = 0
+            while cap.grab():
+                if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                    keyframes.append(frame_number)
+                frame_number += 1
+        finally:
+            cap.release()
+        getLog().info(f'Found {len(keyframes)} keyframes in {frame_number} frames of {video_path}')
+        return KeyframeIndex(keyframes, os.path.getsize(video_path))
+
+    @staticmethod
+    def load_or_build(video_path: str, filename: str) -> "KeyframeIndex":
+        """Load the index saved next to the video, rebuilding and saving it if missing or stale."""
+        video_size = os.path.getsize(video_path)
+        if os.path.exists(filename):
+            try:
+                index = KeyframeIndex.load(filename)
+                if index.video_size == video_size:
+                    return index
+                getLog().info(f'Keyframe index {filename} is stale, rebuilding')
+            except (OSError, ValueError, KeyError) as e:
+                getLog().warning(f'Error loading keyframe index {filename}: {e}')
+        index = KeyframeIndex.build(video_path)
+        try:
+            index.save(filename)
+        except OSError as e:
+            getLog().warning(f'Could not save keyframe index to {filename}: {e}')
+        return index
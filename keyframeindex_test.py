@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from keyframeindex import KeyframeIndex, create_keyframe_index_name_from_filename
+
+
+class TestKeyframeIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = KeyframeIndex([0, 12, 24, 36])
+
+    def test_keyframe_at_or_before(self):
+        self.assertEqual(self.index.keyframe_at_or_before(0), 0)
+        self.assertEqual(self.index.keyframe_at_or_before(11), 0)
+        self.assertEqual(self.index.keyframe_at_or_before(12), 12)
+        self.assertEqual(self.index.keyframe_at_or_before(100), 36)
+
+    def test_keyframe_after_and_nearest(self):
+        self.assertEqual(self.index.keyframe_after(12), 24)
+        self.assertIsNone(self.index.keyframe_after(36))
+        self.assertEqual(self.index.nearest_keyframe(17), 12)
+        self.assertEqual(self.index.nearest_keyframe(20), 24)
+
+    def test_in_same_gop(self):
+        self.assertTrue(self.index.in_same_gop(13, 23))
+        self.assertFalse(self.index.in_same_gop(11, 12))
+
+    def test_first_frame_is_always_a_keyframe(self):
+        self.assertEqual(KeyframeIndex([30, 10]).keyframes, [0, 10, 30])
+
+    def test_keyframes_in_range(self):
+        self.assertEqual(self.index.keyframes_in_range(12, 36), [12, 24])
+
+    def test_index_file_name(self):
+        self.assertEqual(create_keyframe_index_name_from_filename('video.mp4'), 'video.keyframes.json')
+
+    def test_build_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            video_path = os.path.join(tmp_dir, 'video.mp4')
+            writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'mp4v'), 30, (64, 48))
+            for i in range(40):
+                frame = np.zeros((48, 64, 3), dtype=np.uint8)
+                frame[:, i] = 255
+                writer.write(frame)
+            writer.release()
+
+            index_path = create_keyframe_index_name_from_filename(video_path)
+            built = KeyframeIndex.load_or_build(video_path, index_path)
+            self.assertEqual(built.keyframes[0], 0)
+            self.assertGreater(len(built.keyframes), 1)
+            self.assertTrue(os.path.exists(index_path))
+
+            loaded = KeyframeIndex.load(index_path)
+            self.assertEqual(loaded.keyframes, built.keyframes)
+            self.assertEqual(loaded.video_size, os.path.getsize(video_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
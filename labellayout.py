@@ -0,0 +1,57 @@
+from collections import OrderedDict
+from typing import Callable
+
+LABEL_LAYOUT_CACHE_SIZE: int = 1024  # Truncated labels kept, enough for every box on a busy frame at a few sizes
+ELLIPSIS: str = "..."
+
+TextWidth = Callable[[str], int]
+
+
+def truncate_label(text: str, max_width: int, text_width: TextWidth) -> str:
+    """Cut text down to its longest prefix that fits in max_width, ending it with an ellipsis if it was cut.
+
+    The prefix is found by bisection, so only about log2(len(text)) widths are measured.
+    """
+    if text_width(text) <= max_width:
+        return text
+    low, high = 0, len(text)  # text[:low] fits, text[:high] does not
+    while high - low > 1:
+        middle = (low + high) // 2
+        if text_width(text[:middle]) <= max_width:
+            low = middle
+        else:
+            high = middle
+    truncated = text[:low]
+    if len(truncated) > len(ELLIPSIS):
+        truncated = truncated[:-len(ELLIPSIS)] + ELLIPSIS
+    return truncated
+
+
+class LabelLayoutCache:
+    """Remembers how each label was truncated for each width, so repaints do not measure text again.
+
+    Widths are measured with one font, so make a new cache if the font changes.
+    """
+    __layouts: OrderedDict[tuple[str, int], str]
+    __text_width: TextWidth
+    __max_size: int
+
+    def __init__(self, text_width: TextWidth, max_size: int = LABEL_LAYOUT_CACHE_SIZE):
+        self.__layouts = OrderedDict()
+        self.__text_width = text_width
+        self.__max_size = max_size
+
+    def __len__(self) -> int:
+        return len(self.__layouts)
+
+    def truncated(self, text: str, max_width: int) -> str:
+        key = (text, max_width)
+        layout = self.__layouts.get(key)
+        if layout is not None:
+            self.__layouts.move_to_end(key)
+            return layout
+        layout = truncate_label(text, max_width, self.__text_width)
+        self.__layouts[key] = layout
+        while len(self.__layouts) > self.__max_size:
+            self.__layouts.popitem(last=False)
+        return layout
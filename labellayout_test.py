@@ -0,0 +1,49 @@
+import unittest
+
+from labellayout import LabelLayoutCache, truncate_label
+
+
+def char_width(text: str) -> int:
+    return 7 * len(text)
+
+
+def truncate_one_at_a_time(text: str, max_width: int) -> str:
+    """How labels were truncated before, measuring after every removed character."""
+    truncated = text
+    while char_width(truncated) > max_width and len(truncated) > 0:
+        truncated = truncated[:-1]
+    if truncated != text and len(truncated) > 3:
+        truncated = truncated[:-3] + "..."
+    return truncated
+
+
+class TestLabelLayout(unittest.TestCase):
+    def test_matches_character_by_character_truncation(self):
+        for text in ['', 'a', 'pin', 'unknown-12', 'pin-1, pin-2, pin-3, backing-card']:
+            for max_width in range(-4, 260, 3):
+                with self.subTest(text=text, max_width=max_width):
+                    self.assertEqual(truncate_label(text, max_width, char_width), truncate_one_at_a_time(text, max_width))
+
+    def test_measures_logarithmically_many_prefixes(self):
+        measured: list[str] = []
+        text = 'x' * 1000
+        truncate_label(text, 350, lambda t: measured.append(t) or char_width(t))
+        self.assertLessEqual(len(measured), 12)
+
+    def test_cache_measures_each_label_and_width_once(self):
+        measured: list[str] = []
+        cache = LabelLayoutCache(lambda t: measured.append(t) or char_width(t), max_size=2)
+        self.assertEqual(cache.truncated('unknown-1', 40), 'un...')
+        count = len(measured)
+        self.assertEqual(cache.truncated('unknown-1', 40), 'un...')
+        self.assertEqual(len(measured), count)
+
+        cache.truncated('unknown-1', 80)
+        cache.truncated('pin', 40)
+        self.assertEqual(len(cache), 2)
+        cache.truncated('unknown-1', 40)
+        self.assertGreater(len(measured), count)
+
+
+if __name__ == '__main__':
+    unittest.main()
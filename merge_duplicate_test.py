@@ -1,6 +1,6 @@
 import unittest
 from boxdata import BoxData, Coordinate
-from scrubberframe import merge_duplicate_boxes
+from boxio import box_iou, merge_duplicate_boxes
 
 class TestMergeDuplicateBoxes(unittest.TestCase):
     def test_merge_boxes_with_overlapping_tags(self):
@@ -25,5 +25,53 @@ class TestMergeDuplicateBoxes(unittest.TestCase):
         coords = {box.coords for box in merged}
         self.assertSetEqual(coords, {(1, 2, 3, 4), (5, 6, 7, 8)})
 
+    def test_tags_keep_first_seen_order(self):
+        coord = (10, 20, 30, 40)
+        boxes = [
+            BoxData(coords=coord, tags=['dog', '', 'cat'], source='user'),
+            BoxData(coords=coord, tags=['mouse', 'dog', ' '], source='automatic'),
+            BoxData(coords=coord, tags=['cat', 'ant'], source='automatic'),
+        ]
+        (merged,) = merge_duplicate_boxes(boxes)
+        self.assertEqual(merged.tags, ['dog', 'cat', 'mouse', 'ant'])
+        self.assertEqual(merged.source, 'user')
+        self.assertEqual(boxes[0].tags, ['dog', '', 'cat'])
+
+    def test_many_duplicates(self):
+        boxes = [BoxData(coords=(1, 2, 3, 4), tags=[f'tag-{i % 100}'], source='automatic') for i in range(20000)]
+        (merged,) = merge_duplicate_boxes(boxes)
+        self.assertEqual(merged.tags, [f'tag-{i}' for i in range(100)])
+
+    def test_merge_overlapping_boxes_by_iou(self):
+        automatic = BoxData(coords=(100, 100, 50, 50), tags=['pin'], source='automatic')
+        user = BoxData(coords=(102, 101, 50, 50), tags=['pin', 'blue'], source='user')
+        separate = BoxData(coords=(300, 300, 50, 50), tags=['other'], source='automatic')
+
+        self.assertEqual(len(merge_duplicate_boxes([automatic, user, separate])), 3)
+        merged = merge_duplicate_boxes([automatic, user, separate], iou_threshold=0.8)
+        self.assertEqual(len(merged), 2)
+        self.assertEqual(merged[0].coords, (102, 101, 50, 50))
+        self.assertEqual(merged[0].source, 'user')
+        self.assertEqual(merged[0].tags, ['pin', 'blue'])
+        self.assertEqual(merged[1].tags, ['other'])
+
+    def test_many_overlapping_boxes(self):
+        # A dense board: 100 x 100 boxes, each with a slightly offset automatic duplicate
+        boxes = []
+        for i in range(10000):
+            x, y = (i % 100) * 60, (i // 100) * 60
+            boxes.append(BoxData(coords=(x, y, 50, 50), tags=[f'pin-{i}'], source='user'))
+            boxes.append(BoxData(coords=(x + 1, y + 1, 50, 50), tags=[f'pin-{i}', 'tracked'], source='automatic'))
+        merged = merge_duplicate_boxes(boxes, iou_threshold=0.85)
+        self.assertEqual(len(merged), 10000)
+        self.assertEqual(merged[1234].coords, (34 * 60, 12 * 60, 50, 50))
+        self.assertEqual(merged[1234].tags, ['pin-1234', 'tracked'])
+
+    def test_box_iou(self):
+        self.assertAlmostEqual(box_iou((0, 0, 10, 10), (5, 0, 10, 10)), 50 / 150)
+        self.assertEqual(box_iou((0, 0, 10, 10), (10, 0, 10, 10)), 0.0)
+        self.assertEqual(box_iou((0, 0, 10, 10), (0, 0, 10, 10)), 1.0)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,136 @@
+import threading
+from collections import OrderedDict
+from copy import copy
+
+import cv2
+import numpy as np
+
+from boxdata import BoxData, Coordinate
+
+FrameIndex = int
+Shift = tuple[float, float]  # (dx, dy) in full resolution pixels
+
+MOTION_SCALE: float = 0.25  # Frames are shrunk by this much before estimating motion
+MOTION_THRESHOLD: float = 1.5  # Global motion, in full resolution pixels, below which boxes are shifted instead of tracked
+MOTION_MIN_RESPONSE: float = 0.3  # Phase correlation peak below which the estimate is not trusted
+MOTION_MAX_BOX_DIFFERENCE: float = 6.0  # Mean grey level change inside a shifted box above which it is tracked anyway
+MOTION_CACHE_SIZE: int = 8  # Shrunk frames kept, enough for stepping back and forth
+
+
+class MotionGate:
+    """Spots frame pairs where the camera has barely moved, so boxes can be shifted rather than tracked.
+
+    The global motion between two frames is estimated by phase correlation on shrunk grayscale
+    copies, which costs a fraction of detecting features. When it is small and confident, each box
+    whose contents are also unchanged after the shift is moved by it directly. Safe to call from
+    several threads at once.
+    """
+    __threshold: float
+    __scale: float
+    __min_response: float
+    __max_box_difference: float
+    __frames: OrderedDict[FrameIndex, np.ndarray]
+    __windows: dict[tuple[int, int], np.ndarray]
+    __lock: threading.Lock
+
+    def __init__(
+        self,
+        threshold: float = MOTION_THRESHOLD,
+        scale: float = MOTION_SCALE,
+        min_response: float = MOTION_MIN_RESPONSE,
+        max_box_difference: float = MOTION_MAX_BOX_DIFFERENCE
+    ):
+        self.__threshold = threshold
+        self.__scale = scale
+        self.__min_response = min_response
+        self.__max_box_difference = max_box_difference
+        self.__frames = OrderedDict()
+        self.__windows = {}
+        self.__lock = threading.Lock()
+
+    def small_frame(self, index: FrameIndex, frame: np.ndarray) -> np.ndarray:
+        """Get the shrunk float32 grayscale copy of a frame, making it only on first use."""
+        with self.__lock:
+            small = self.__frames.get(index)
+            if small is not None:
+                self.__frames.move_to_end(index)
+                return small
+
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+            small = cv2.resize(gray, None, fx=self.__scale, fy=self.__scale, interpolation=cv2.INTER_AREA)
+            small = small.astype(np.float32)
+            self.__frames[index] = small
+            while len(self.__frames) > MOTION_CACHE_SIZE:
+                self.__frames.popitem(last=False)
+            return small
+
+    def __window(self, shape: tuple[int, int]) -> np.ndarray:
+        with self.__lock:
+            window = self.__windows.get(shape)
+            if window is None:
+                window = cv2.createHanningWindow((shape[1], shape[0]), cv2.CV_32F)
+                self.__windows[shape] = window
+            return window
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__frames.clear()
+
+    def global_motion(
+        self,
+        prev_index: FrameIndex,
+        prev_frame: np.ndarray,
+        next_index: FrameIndex,
+        next_frame: np.ndarray
+    ) -> Shift | None:
+        """Get how far the scene moved between the frames, or None if it moved too much or unclearly to say."""
+        prev_small = self.small_frame(prev_index, prev_frame)
+        next_small = self.small_frame(next_index, next_frame)
+        if prev_small.shape != next_small.shape:
+            return None
+        (dx, dy), response = cv2.phaseCorrelate(prev_small, next_small, self.__window(prev_small.shape))
+        dx, dy = dx / self.__scale, dy / self.__scale
+        if response < self.__min_response or np.hypot(dx, dy) > self.__threshold:
+            return None
+        return dx, dy
+
+    def box_unchanged(self, prev_small: np.ndarray, next_small: np.ndarray, coords: Coordinate, shift: Shift) -> bool:
+        """Check whether the box's contents look the same once moved by shift."""
+        x, y, w, h = (v * self.__scale for v in coords)
+        dx, dy = shift[0] * self.__scale, shift[1] * self.__scale
+        height, width = prev_small.shape
+        x0, y0 = max(int(x), 0), max(int(y), 0)
+        x1, y1 = min(int(x + w), width), min(int(y + h), height)
+        # Compare against the next frame at the nearest whole-pixel shift, clipped to both frames
+        sx, sy = int(round(dx)), int(round(dy))
+        x0, x1 = max(x0, -sx), min(x1, width - sx)
+        y0, y1 = max(y0, -sy), min(y1, height - sy)
+        if x1 <= x0 or y1 <= y0:
+            return False
+        difference = cv2.absdiff(prev_small[y0:y1, x0:x1], next_small[y0 + sy:y1 + sy, x0 + sx:x1 + sx])
+        return float(difference.mean()) <= self.__max_box_difference
+
+    def shift_boxes(
+        self,
+        prev_index: FrameIndex,
+        prev_frame: np.ndarray,
+        next_index: FrameIndex,
+        next_frame: np.ndarray,
+        boxes: list[BoxData]
+    ) -> list[BoxData | None]:
+        """Shift each box that can skip tracking, giving None for boxes that still need tracking."""
+        shift = self.global_motion(prev_index, prev_frame, next_index, next_frame)
+        if shift is None:
+            return [None] * len(boxes)
+
+        prev_small = self.small_frame(prev_index, prev_frame)
+        next_small = self.small_frame(next_index, next_frame)
+        shifted: list[BoxData | None] = []
+        for box in boxes:
+            if not self.box_unchanged(prev_small, next_small, box.coords, shift):
+                shifted.append(None)
+                continue
+            x, y, w, h = box.coords
+            coords = (int(round(x + shift[0])), int(round(y + shift[1])), w, h)
+            shifted.append(BoxData(coords=coords, tags=copy(box.tags), source='automatic'))
+        return shifted
@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from boxdata import BoxData
+from motion import MotionGate
+from tracker import OrbTracker
+from tracker_test import make_textured_frame, shift_frame
+
+
+class TestMotionGate(unittest.TestCase):
+    def test_still_frames_shift_boxes(self):
+        frame = make_textured_frame()
+        boxes = [BoxData((100, 80, 60, 50), ['pin'], 'user')]
+        (shifted,) = MotionGate().shift_boxes(0, frame, 1, frame.copy(), boxes)
+        self.assertIsNotNone(shifted)
+        self.assertEqual(shifted.coords, (100, 80, 60, 50))
+        self.assertEqual(shifted.tags, ['pin'])
+        self.assertIsNot(shifted.tags, boxes[0].tags)
+        self.assertEqual(shifted.source, 'automatic')
+
+    def test_large_motion_is_not_gated(self):
+        frame = make_textured_frame()
+        self.assertIsNone(MotionGate().global_motion(0, frame, 1, shift_frame(frame, 12, 0)))
+
+    def test_unrelated_frames_are_not_gated(self):
+        self.assertIsNone(MotionGate().global_motion(0, make_textured_frame(0), 1, make_textured_frame(1)))
+
+    def test_changed_box_is_tracked(self):
+        prev_frame = make_textured_frame()
+        next_frame = prev_frame.copy()
+        next_frame[80:130, 100:160] = 255 - next_frame[80:130, 100:160]  # Something moved inside the box
+        boxes = [BoxData((100, 80, 60, 50), ['moved'], 'user'), BoxData((200, 150, 40, 40), ['still'], 'user')]
+        moved, still = MotionGate().shift_boxes(0, prev_frame, 1, next_frame, boxes)
+        self.assertIsNone(moved)
+        self.assertIsNotNone(still)
+
+    def test_gated_tracker_skips_feature_detection(self):
+        frame = make_textured_frame()
+        tracker = OrbTracker()
+        tracker.motion_gate = MotionGate()
+        found = tracker.track_boxes(0, frame, 1, frame.copy(), [BoxData((100, 80, 60, 50), ['pin'], 'user')])
+        self.assertEqual([box.coords for box in found], [(100, 80, 60, 50)])
+        # Nothing needed tracking, so neither frame's keypoints were detected
+        self.assertEqual(len(tracker.frame_features(0, np.zeros_like(frame))[0]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,263 @@
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterator
+
+import numpy as np
+
+from boxdata import BoxData
+from boxio import load_boxes_from_file, save_boxes_to_file, filter_zero_sized_boxes
+from keyframeindex import KeyframeIndex, create_keyframe_index_name_from_filename
+from logutil import getLog
+from tracker import DEFAULT_TRACKER, Tracker, create_tracker
+from videoreader import VideoReader
+
+FrameIndex = int
+FrameBoxes = dict[FrameIndex, list[BoxData]]
+
+BACKWARD_CHUNK_FRAMES: int = 16  # Frames decoded forward and held in memory per step when propagating backward
+PROGRESS_INTERVAL: int = 500  # Frames between progress log messages
+
+
+def step_towards(start: FrameIndex, end: FrameIndex) -> int:
+    return 1 if end >= start else -1
+
+
+def decode_range(reader: VideoReader, start: FrameIndex, end: FrameIndex) -> Iterator[tuple[FrameIndex, np.ndarray]]:
+    """Yield the frames from start to end inclusive, in that order, only ever decoding forward.
+
+    Backward ranges are decoded forward in chunks of BACKWARD_CHUNK_FRAMES and yielded in reverse.
+    """
+    if end >= start:
+        for index in range(start, end + 1):
+            frame = reader.read(index)
+            if frame is None:
+                return
+            yield index, frame
+        return
+
+    chunk_end = start
+    while chunk_end >= end:
+        chunk_start = max(end, chunk_end - BACKWARD_CHUNK_FRAMES + 1)
+        frames = [reader.read(index) for index in range(chunk_start, chunk_end + 1)]
+        for offset in range(len(frames) - 1, -1, -1):
+            if frames[offset] is not None:
+                yield chunk_start + offset, frames[offset]
+        chunk_end = chunk_start - 1
+
+
+def next_seeded_frame(frame_boxes: FrameBoxes, position: FrameIndex, end: FrameIndex) -> FrameIndex | None:
+    """Get the first frame from position towards end (inclusive) that has boxes to propagate."""
+    step = step_towards(position, end)
+    seeded = [
+        index for index, boxes in frame_boxes.items()
+        if boxes and (position <= index <= end if step > 0 else end <= index <= position)
+    ]
+    if not seeded:
+        return None
+    return min(seeded) if step > 0 else max(seeded)
+
+
+def propagate_run(
+    reader: VideoReader,
+    frame_boxes: FrameBoxes,
+    seed: FrameIndex,
+    end: FrameIndex,
+    tracker: Tracker,
+    executor: Executor | None = None
+) -> FrameIndex:
+    """Propagate boxes from the seed frame towards end until they are all lost, returning the last frame reached.
+
+    Follows the same rules as pressing Next in the UI: frames that already have boxes keep them
+    and become the source for the frames after them, and frames without boxes get the previous
+    frame's boxes tracked into them.
+    """
+    log = getLog()
+    prev_index: FrameIndex | None = None
+    prev_frame: np.ndarray | None = None
+    carried: list[BoxData] = []
+    last_index = seed
+    for index, frame in decode_range(reader, seed, end):
+        last_index = index
+        existing = frame_boxes.get(index)
+        if existing:
+            carried = existing
+        elif prev_frame is not None:
+            carried = tracker.track_boxes(prev_index, prev_frame, index, frame, carried, executor)
+            frame_boxes[index] = carried
+            if not carried:
+                log.info(f'Lost all boxes at frame {index}')
+                break
+        if abs(index - seed) % PROGRESS_INTERVAL == 0:
+            log.info(f'Propagating boxes: frame {index}, {len(carried)} boxes, '
+                     f'{tracker.mean_frame_seconds * 1000:.1f}ms per frame with {tracker.name}')
+        prev_index, prev_frame = index, frame
+    return last_index
+
+
+def propagate_boxes(
+    reader: VideoReader,
+    frame_boxes: FrameBoxes,
+    start: FrameIndex,
+    end: FrameIndex,
+    tracker: Tracker | None = None,
+    executor: Executor | None = None
+) -> FrameBoxes:
+    """Track boxes through frames start to end inclusive (backward if end < start), updating frame_boxes in place.
+
+    Stretches of the range with no boxes to carry forward are skipped without decoding them.
+    """
+    if tracker is None:
+        tracker = create_tracker()
+    step = step_towards(start, end)
+    position = start
+    while (position <= end) if step > 0 else (position >= end):
+        seed = next_seeded_frame(frame_boxes, position, end)
+        if seed is None:
+            break
+        position = propagate_run(reader, frame_boxes, seed, end, tracker, executor) + step
+    return frame_boxes
+
+
+def split_at_keyframes(
+    first: FrameIndex,
+    last: FrameIndex,
+    keyframes: list[FrameIndex],
+    count: int
+) -> list[tuple[FrameIndex, FrameIndex]]:
+    """Split frames first..last into about count (first, last) segments, each starting at a keyframe.
+
+    Starting segments at keyframes means each worker's first seek decodes no wasted frames.
+    Without any keyframes in range the frames are split evenly.
+    """
+    candidates = [k for k in keyframes if first < k <= last]
+    boundaries: set[FrameIndex] = set()
+    for i in range(1, count):
+        target = first + (last - first + 1) * i // count
+        boundaries.add(min(candidates, key=lambda k: abs(k - target)) if candidates else target)
+    edges = [first] + sorted(b for b in boundaries if first < b <= last) + [last + 1]
+    return [(a, b - 1) for a, b in zip(edges, edges[1:])]
+
+
+def join_unseeded_segments(
+    segments: list[tuple[FrameIndex, FrameIndex]],
+    frame_boxes: FrameBoxes
+) -> list[tuple[FrameIndex, FrameIndex]]:
+    """Join each (start, end) segment, in propagation order, onto the one before it unless its start frame has boxes.
+
+    Boxes tracked to the end of one segment carry on into the next, as they would in one process,
+    unless the next segment's first frame has boxes of its own to start from instead. Only
+    segments that start from their own boxes can be propagated independently.
+    """
+    joined = segments[:1]
+    for segment_start, segment_end in segments[1:]:
+        if frame_boxes.get(segment_start):
+            joined.append((segment_start, segment_end))
+        else:
+            joined[-1] = (joined[-1][0], segment_end)
+    return joined
+
+
+def propagate_segment(
+    video_path: str,
+    frame_boxes: FrameBoxes,
+    start: FrameIndex,
+    end: FrameIndex,
+    keyframes: list[FrameIndex],
+    tracker_name: str = DEFAULT_TRACKER
+) -> FrameBoxes:
+    """Worker process entry point: propagate the boxes seeded within one segment on a decoder of its own."""
+    reader = VideoReader(video_path, KeyframeIndex(keyframes))
+    try:
+        propagate_boxes(reader, frame_boxes, start, end, create_tracker(tracker_name))
+    finally:
+        reader.release()
+    return frame_boxes
+
+
+def propagate_sharded(
+    video_path: str,
+    frame_boxes: FrameBoxes,
+    start: FrameIndex,
+    end: FrameIndex,
+    keyframe_index: KeyframeIndex | None = None,
+    processes: int | None = None,
+    tracker_name: str = DEFAULT_TRACKER
+) -> FrameBoxes:
+    """Like propagate_boxes, but splits the range into segments propagated in parallel worker processes.
+
+    Boxes tracked by one worker are not available to the next, so segments are joined until each
+    starts at a frame with boxes, and the output matches propagating in one process. Results are
+    merged in segment order, so the output does not depend on which worker finishes first.
+    """
+    processes = processes or os.cpu_count() or 1
+    step = step_towards(start, end)
+    keyframes = keyframe_index.keyframes if keyframe_index is not None else []
+    segments = split_at_keyframes(min(start, end), max(start, end), keyframes, processes)
+    if step < 0:
+        segments = [(last, first) for first, last in reversed(segments)]
+    segments = join_unseeded_segments(segments, frame_boxes)
+
+    if len(segments) == 1:
+        getLog().warning(f'No frames between {start} and {end} have boxes to start a segment from, '
+                         f'so boxes are propagated in one process')
+        return propagate_segment(video_path, frame_boxes, start, end, keyframes, tracker_name)
+
+    getLog().info(f'Propagating {len(segments)} segments in parallel')
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = []
+        for segment_start, segment_end in segments:
+            first, last = min(segment_start, segment_end), max(segment_start, segment_end)
+            seeds = {index: boxes for index, boxes in frame_boxes.items() if first <= index <= last and boxes}
+            if not seeds:
+                continue
+            futures.append(executor.submit(
+                propagate_segment, video_path, seeds, segment_start, segment_end, keyframes, tracker_name
+            ))
+        for future in futures:
+            frame_boxes.update(sorted(future.result().items()))
+    return frame_boxes
+
+
+def propagate_file(
+    video_path: str,
+    box_data_filename: str,
+    start: FrameIndex,
+    end: FrameIndex,
+    output_filename: str | None = None,
+    processes: int = 1,
+    tracker_name: str = DEFAULT_TRACKER
+) -> FrameBoxes:
+    """Load boxes for a video, propagate them through a frame range and save them in the same JSON format.
+
+    With more than one process the range is split into segments at keyframes and propagated in parallel.
+    """
+    log = getLog()
+    frame_boxes = filter_zero_sized_boxes(load_boxes_from_file(box_data_filename))
+
+    keyframe_filename = create_keyframe_index_name_from_filename(video_path)
+    keyframe_index: KeyframeIndex | None = None
+    if processes > 1:
+        keyframe_index = KeyframeIndex.load_or_build(video_path, keyframe_filename)
+    elif os.path.exists(keyframe_filename):
+        keyframe_index = KeyframeIndex.load(keyframe_filename)
+
+    reader = VideoReader(video_path, keyframe_index)
+    try:
+        last_frame = reader.frame_count - 1
+        start = max(0, min(start, last_frame))
+        end = max(0, min(end, last_frame))
+        log.info(f'Propagating boxes in {video_path} from frame {start} to {end}')
+        if processes > 1:
+            propagate_sharded(video_path, frame_boxes, start, end, keyframe_index, processes, tracker_name)
+        else:
+            tracker = create_tracker(tracker_name)
+            with ThreadPoolExecutor(thread_name_prefix='BoxTracking') as executor:
+                propagate_boxes(reader, frame_boxes, start, end, tracker, executor)
+            log.info(f'Tracked with {tracker.name} in {tracker.mean_frame_seconds * 1000:.1f}ms per frame')
+    finally:
+        reader.release()
+
+    output_filename = output_filename or box_data_filename
+    save_boxes_to_file(output_filename, frame_boxes)
+    log.info(f'{sum(len(boxes) for boxes in frame_boxes.values())} boxes saved to {output_filename}')
+    return frame_boxes
@@ -0,0 +1,151 @@
+import os
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from boxdata import BoxData
+from boxio import load_boxes_from_file, save_boxes_to_file
+from keyframeindex import KeyframeIndex
+from propagate import (
+    decode_range, join_unseeded_segments, propagate_boxes, propagate_file, propagate_sharded, split_at_keyframes
+)
+from tracker import create_tracker
+from videoreader import VideoReader
+
+FRAME_COUNT: int = 12
+SHIFT_PER_FRAME: int = 4
+
+
+def write_panning_video(video_path: str) -> None:
+    """Write a video of a coarse random texture panning right by SHIFT_PER_FRAME pixels per frame."""
+    rng = np.random.default_rng(0)
+    texture = np.kron(rng.integers(0, 256, (30, 60), dtype=np.uint8), np.ones((8, 8), dtype=np.uint8))
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (320, 240))
+    for i in range(FRAME_COUNT):
+        x = 100 - i * SHIFT_PER_FRAME
+        gray = texture[:240, x:x + 320]
+        writer.write(np.dstack([gray, gray, gray]))
+    writer.release()
+
+
+class TestPropagate(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.video_path = os.path.join(self.tmp_dir.name, 'video.avi')
+        write_panning_video(self.video_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_decode_range_backward_yields_descending_frames(self):
+        reader = VideoReader(self.video_path)
+        try:
+            indices = [index for index, _ in decode_range(reader, 9, 2)]
+        finally:
+            reader.release()
+        self.assertEqual(indices, list(range(9, 1, -1)))
+
+    def test_propagates_forward_and_keeps_existing_frames(self):
+        frame_boxes = {
+            0: [BoxData((100, 80, 60, 60), ['pin'], 'user')],
+            6: [BoxData((10, 10, 40, 40), ['other'], 'user')],
+        }
+        reader = VideoReader(self.video_path)
+        try:
+            propagate_boxes(reader, frame_boxes, 0, 4)
+        finally:
+            reader.release()
+
+        self.assertEqual(sorted(frame_boxes), [0, 1, 2, 3, 4, 6])
+        for index in range(1, 5):
+            (box,) = frame_boxes[index]
+            self.assertEqual(box.source, 'automatic')
+            self.assertEqual(box.tags, ['pin'])
+            self.assertAlmostEqual(box.coords[0], 100 + index * SHIFT_PER_FRAME, delta=3)
+        self.assertEqual(frame_boxes[6][0].tags, ['other'])
+
+    def test_propagates_backward(self):
+        frame_boxes = {8: [BoxData((150, 80, 60, 60), ['pin'], 'user')]}
+        reader = VideoReader(self.video_path)
+        try:
+            propagate_boxes(reader, frame_boxes, 8, 5)
+        finally:
+            reader.release()
+
+        self.assertEqual(sorted(frame_boxes), [5, 6, 7, 8])
+        self.assertAlmostEqual(frame_boxes[5][0].coords[0], 150 - 3 * SHIFT_PER_FRAME, delta=3)
+
+    def test_propagates_with_optical_flow_tracker(self):
+        frame_boxes = {0: [BoxData((100, 80, 60, 60), ['pin'], 'user')]}
+        reader = VideoReader(self.video_path)
+        try:
+            propagate_boxes(reader, frame_boxes, 0, 4, create_tracker('flow'))
+        finally:
+            reader.release()
+
+        self.assertEqual(sorted(frame_boxes), [0, 1, 2, 3, 4])
+        self.assertAlmostEqual(frame_boxes[4][0].coords[0], 100 + 4 * SHIFT_PER_FRAME, delta=3)
+
+    def test_split_at_keyframes(self):
+        self.assertEqual(split_at_keyframes(0, 99, [0, 30, 60, 90], 3), [(0, 29), (30, 59), (60, 99)])
+        self.assertEqual(split_at_keyframes(0, 99, [], 2), [(0, 49), (50, 99)])
+        self.assertEqual(split_at_keyframes(0, 99, [0, 30, 60, 90], 1), [(0, 99)])
+        # Two targets nearest the same keyframe collapse into one boundary
+        self.assertEqual(split_at_keyframes(0, 99, [0, 50], 3), [(0, 49), (50, 99)])
+
+    def test_sharded_propagation_matches_per_segment_seeds(self):
+        frame_boxes = {
+            0: [BoxData((100, 80, 60, 60), ['first'], 'user')],
+            6: [BoxData((100, 80, 60, 60), ['second'], 'user')],
+        }
+        keyframe_index = KeyframeIndex(list(range(FRAME_COUNT)))
+        propagate_sharded(self.video_path, frame_boxes, 0, FRAME_COUNT - 1, keyframe_index, processes=2)
+
+        self.assertEqual(sorted(frame_boxes), list(range(FRAME_COUNT)))
+        self.assertEqual(frame_boxes[5][0].tags, ['first'])
+        self.assertEqual(frame_boxes[11][0].tags, ['second'])
+        self.assertAlmostEqual(frame_boxes[11][0].coords[0], 100 + 5 * SHIFT_PER_FRAME, delta=3)
+
+    def test_join_unseeded_segments(self):
+        frame_boxes = {0: [BoxData((1, 1, 1, 1), [], 'user')], 60: [BoxData((1, 1, 1, 1), [], 'user')], 30: []}
+        segments = [(0, 29), (30, 59), (60, 99)]
+        self.assertEqual(join_unseeded_segments(segments, frame_boxes), [(0, 59), (60, 99)])
+        backward = [(99, 60), (59, 30), (29, 0)]
+        self.assertEqual(join_unseeded_segments(backward, frame_boxes), [(99, 0)])
+
+    def test_sharded_propagation_from_one_seed_matches_one_process(self):
+        keyframe_index = KeyframeIndex(list(range(FRAME_COUNT)))
+        for start, end in [(0, FRAME_COUNT - 1), (FRAME_COUNT - 1, 0)]:
+            with self.subTest(start=start, end=end):
+                def seeded():
+                    return {start: [BoxData((100, 80, 60, 60), ['pin'], 'user')]}
+
+                reader = VideoReader(self.video_path)
+                try:
+                    expected = propagate_boxes(reader, seeded(), start, end)
+                finally:
+                    reader.release()
+                sharded = propagate_sharded(self.video_path, seeded(), start, end, keyframe_index, processes=3)
+
+                self.assertEqual(sorted(sharded), list(range(FRAME_COUNT)))
+                self.assertEqual(
+                    {index: [box.coords for box in boxes] for index, boxes in sharded.items()},
+                    {index: [box.coords for box in boxes] for index, boxes in expected.items()}
+                )
+
+    def test_propagate_file_writes_box_json(self):
+        box_path = os.path.join(self.tmp_dir.name, 'video.json')
+        output_path = os.path.join(self.tmp_dir.name, 'output.json')
+        save_boxes_to_file(box_path, {0: [BoxData((100, 80, 60, 60), ['pin'], 'user')]})
+
+        propagate_file(self.video_path, box_path, 0, 100, output_path)
+
+        saved = load_boxes_from_file(output_path)
+        self.assertEqual(sorted(saved), list(range(FRAME_COUNT)))
+        self.assertEqual(saved[0][0].source, 'user')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+import argparse
+
+from boxio import create_box_data_name_from_filename
+from propagate import propagate_file
+from tracker import DEFAULT_TRACKER, TRACKERS
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Propagate tagged boxes through a range of video frames without the UI.')
+    parser.add_argument('video', help='Video file to track boxes in')
+    parser.add_argument('--boxes', help='Box data JSON file (default: the video file name with a .json extension)')
+    parser.add_argument('--start', type=int, default=0, help='First frame to propagate from')
+    parser.add_argument('--end', type=int, default=-1,
+                        help='Last frame to propagate to, before --start to propagate backward (default: last frame)')
+    parser.add_argument('--output', help='File to write the boxes to (default: overwrite --boxes)')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='Worker processes; more than one splits the range into segments at keyframes')
+    parser.add_argument('--tracker', choices=list(TRACKERS), default=DEFAULT_TRACKER,
+                        help=f'Tracker backend (default: {DEFAULT_TRACKER})')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    box_data_filename = args.boxes or create_box_data_name_from_filename(args.video)
+    end = args.end if args.end >= 0 else 2 ** 31 - 1  # Clamped to the last frame of the video
+    propagate_file(args.video, box_data_filename, args.start, end, args.output, args.processes, args.tracker)
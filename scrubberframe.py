@@ -1,103 +1,57 @@
-import json
 import os
-from copy import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
 
 import cv2
 import numpy as np
 import wx
 
-from boxdata import BoxData, Coordinate
+from boxcolumns import BOX_COLUMNS_EXTENSION
+from boxdata import BoxData
+from boxio import create_box_data_name_from_filename
+from boxhistory import AddBox, BoxHistory, EditBatch
+from boxjournal import BoxJournal
+from boxstore import LazyFrameBoxes
 from controlspanel import ControlsPanel
+from events.BoxEditedEvent import BoxEditedEvent
 from events.BoxSelectedEvent import BoxSelectedEvent
-from events.events import EVT_BOX_SELECTED
+from events.BoxUpdatedEvent import BoxUpdatedEvent
+from events.FramePrefetchedEvent import FramePrefetchedEvent
+from events.events import (
+    EVT_BOX_ADDED, EVT_BOX_EDITED, EVT_BOX_REMOVED, EVT_BOX_SELECTED, EVT_BOX_UPDATED, EVT_FRAME_PREFETCHED
+)
+from framecache import FrameCache, DEFAULT_DISPLAY_CACHE_BYTES
+from frameprefetcher import FramePrefetcher
 from imagepanel import ImagePanel
+from imageutil import ImageSize, make_display_proxy, rotate_image, rotated_size
+from keyframeindex import KeyframeIndex
 from logutil import getLog
 from markerpanel import MarkerPanel  # Adjust import as needed
 from tagpanel import TagPanel
+from tracker import DEFAULT_TRACKER, Tracker, create_tracker
 
-def remove_empty(tags: List[str]) -> List[str]:
-    """Remove empty tags from the list."""
-    return [tag for tag in tags if tag.strip()]
-
-def save_boxes_to_stream(stream, frame_boxes: dict[int, list[BoxData]]) -> None:
-    # frame_boxes: {frame_number: [BoxData, ...]}
-    serializable = {
-        frame: [
-            {"coords": box.coords, "tags": remove_empty(box.tags), "source": box.source}
-            for box in boxes
-        ]
-        for frame, boxes in frame_boxes.items()
-    }
-    json.dump(serializable, stream)
-
-def save_boxes_to_file(filename: str, frame_boxes: dict[int, list[BoxData]]) -> None:
-    with open(filename, "w", encoding="utf-8") as f:
-        save_boxes_to_stream(f, frame_boxes)
-
-def merge_duplicate_boxes(boxes: List[BoxData]) -> List[BoxData]:
-    """Merge boxes with the same coordinates and tags."""
-    merged: Dict[Coordinate, BoxData] = {}
-    for box in boxes:
-        key = box.coords # , tuple(sorted(box.tags)))
-        if key not in merged:
-            merged[key] = BoxData(coords=box.coords, tags=copy(box.tags), source=box.source)
-        else:
-            merged[key].tags.extend(box.tags)
-            merged[key].tags = remove_empty(merged[key].tags)
-
-    # Remove duplicates in tags
-    for box in merged.values():
-        box.tags = list(set(box.tags))  # Remove duplicate tags
-
-    return list(merged.values())
-
-def load_boxes_from_stream(stream) -> dict[int, list[BoxData]]:
-    data = json.load(stream)
-    return {
-        int(frame): merge_duplicate_boxes([BoxData(tuple(box["coords"]), list(box["tags"]), box.get("source", "automatic")) for box in boxes])
-        for frame, boxes in data.items()
-    }
-
-def load_boxes_from_file(filename: str) -> dict[int, list[BoxData]]:
-    with open(filename, "r", encoding="utf-8") as f:
-        return load_boxes_from_stream(f)
-
-def filter_zero_sized_boxes(boxes: dict[int, list[BoxData]]) -> dict[int, list[BoxData]]:
-    """Filter out boxes with zero width or height."""
-    filtered_boxes: Dict[int, List[BoxData]] = {}
-    for frame_index, box_list in boxes.items():
-        for box in box_list:
-            if not isinstance(box, BoxData):
-                getLog().warning(f"Skipping non-BoxData object: {box}")
-                continue
-            if not isinstance(box.coords, tuple) or len(box.coords) != 4:
-                getLog().warning(f"Skipping box with invalid coords: {box.coords}")
-                continue
-            if not box.is_non_zero_sized():
-                getLog().debug(f"Skipping zero-sized box: {box.coords}")
-                continue
-
-            if frame_index not in filtered_boxes:
-                filtered_boxes[frame_index] = []
-            filtered_boxes[frame_index].append(box)
-
-    return filtered_boxes
+SCRUB_SETTLE_MS: int = 150  # Slider idle time before the exact frame is decoded
+RESIZE_SETTLE_MS: int = 100  # Window resize idle time before the frame is rescaled
 
 
 class ScrubberFrame(wx.Frame):
-    __frame_boxes: Dict[int, List[BoxData]] = {}  # Map of frame index to BoxData
+    __frame_boxes: LazyFrameBoxes  # Map of frame index to BoxData, loaded a frame at a time
     # __boxes: List[BoxData] = []  # Or load from your data source
     __image_panel: ImagePanel
     __button_panel: ControlsPanel
     __box_data_filename: str | None = None
+    __journal: BoxJournal | None = None  # Records box changes as they happen, next to the box data file
+    __history: BoxHistory  # Undo history of box edits in every frame
+    _prefetcher: FramePrefetcher | None = None
+    _display_pending: bool = False
+    _keyframe_index: KeyframeIndex | None = None
+    _display_size: ImageSize | None = None  # Panel size the last frame was displayed at
 
     @staticmethod
     def create_box_data_name_from_filename(file_name: str) -> str:
         """Create a box data name from the file name."""
-        """Return the filename with its extension replaced by .json."""
-        base, _ = os.path.splitext(file_name)
-        return base + ".json"
+        return create_box_data_name_from_filename(file_name)
 
     @property
     def box_data_filename(self) -> str | None:
@@ -110,15 +64,30 @@ class ScrubberFrame(wx.Frame):
         if filename is not None and not filename.endswith('.json'):
             raise ValueError("Box data filename must end with .json")
         self.__box_data_filename = filename
+        if self.__journal is not None:
+            self.__journal.close()
+        self.__journal = BoxJournal(filename) if filename is not None else None
         self.Bind(wx.EVT_CLOSE, self.on_close)
 
-    def load_box_data(self) -> Dict[int, List[BoxData]]:
-        """Load box data from the specified file."""
-        if self.box_data_filename and os.path.exists(self.box_data_filename):
+    def load_box_data(self) -> LazyFrameBoxes:
+        """Load box data from the specified file. Each frame's boxes are only built when the frame is shown."""
+        journal = self.__journal
+        columns_filename = os.path.splitext(self.box_data_filename or '')[0] + BOX_COLUMNS_EXTENSION
+        if self.box_data_filename and (
+            os.path.exists(self.box_data_filename)
+            or os.path.exists(columns_filename)
+            or (journal is not None and os.path.exists(journal.journal_filename))
+        ):
             try:
-                boxes = load_boxes_from_file(self.box_data_filename)
-                self.__frame_boxes = filter_zero_sized_boxes(boxes)
-                # self.__frame_boxes = merge_duplicate_boxes(boxes)
+                if os.path.exists(self.box_data_filename) or os.path.exists(columns_filename):
+                    boxes = LazyFrameBoxes.from_box_data_file(self.box_data_filename)
+                else:
+                    boxes = LazyFrameBoxes()
+                if journal is not None:
+                    # Changes made since the snapshot was last written, e.g. before a crash
+                    journal.replay(boxes)
+                self.__frame_boxes = boxes
+                self.__history.clear()
                 count = self.count_boxes()
                 getLog().info(f"Loaded {count} boxes in data from {self.box_data_filename}")
                 return self.__frame_boxes
@@ -126,7 +95,7 @@ class ScrubberFrame(wx.Frame):
                 getLog().error(f"Error loading box data: {e}")
         else:
             getLog().warning("No box data file specified or file does not exist.")
-        return {}
+        return LazyFrameBoxes()
 
     @property
     def current_index(self) -> int:
@@ -136,9 +105,20 @@ class ScrubberFrame(wx.Frame):
         super().__init__(parent, title=title, size=wx.Size(800, 600))
 
         self._current_index = 0
+        self.__frame_boxes = LazyFrameBoxes()
+        self.__history = BoxHistory()
         self._rotation_angle = 0
         self.num_frames = num_frames
+        self._frame_cache = FrameCache()
+        self._display_cache = FrameCache(DEFAULT_DISPLAY_CACHE_BYTES)
+        self._frame_sizes: Dict[int, ImageSize] = {}  # Unrotated (width, height) of each decoded frame
+        self._decode_lock = threading.RLock()  # Decoders are shared with the prefetch thread
+        self._tracker: Tracker = create_tracker(DEFAULT_TRACKER)
+        # OpenCV releases the GIL while matching, so boxes can be tracked in parallel
+        self._tracking_pool = ThreadPoolExecutor(thread_name_prefix='BoxTracking')
         self.Bind(wx.EVT_SIZE, self.on_resize)
+        self.__resize_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.on_resize_settled, self.__resize_timer)
 
         main_panel = wx.Panel(self)
         vbox = wx.BoxSizer(wx.VERTICAL)
@@ -146,6 +126,7 @@ class ScrubberFrame(wx.Frame):
         image_and_tag_sizer = wx.BoxSizer(wx.HORIZONTAL)
 
         self.__image_panel = ImagePanel(main_panel)
+        self.__image_panel.history = self.__history
         # self.image_panel.Bind(EVT_BOX_ADDED, self.image_box_added)
 
         image_and_tag_sizer.Add(self.__image_panel, 1, wx.EXPAND | wx.ALL, 10)
@@ -158,6 +139,12 @@ class ScrubberFrame(wx.Frame):
         self.tag_panel.update_boxes(frame_boxes)
         # print(f'ScrubberFrame.__init__: TagPanel referencing {hex(id(self.__boxes))}=>{self.__boxes}')
         self.tag_panel.bind_box_events(self.__image_panel)
+        # Bound after the tag panel's handlers, so these run first and then skip on to them
+        self.__image_panel.Bind(EVT_BOX_ADDED, self.on_frame_boxes_changed)
+        self.__image_panel.Bind(EVT_BOX_REMOVED, self.on_frame_boxes_changed)
+        self.__image_panel.Bind(EVT_BOX_UPDATED, self.on_frame_boxes_changed)
+        # Label edits are posted by the tag panel's rows and propagate up to the frame
+        self.Bind(EVT_BOX_EDITED, self.on_frame_boxes_changed)
         # self.image_panel.Bind(EVT_BOX_ADDED, self.tag_panel.Refresh)
 
         image_and_tag_sizer.Add(self.tag_panel, 0, wx.EXPAND | wx.ALL, 10)
@@ -176,37 +163,125 @@ class ScrubberFrame(wx.Frame):
         self.slider = wx.Slider(main_panel, value=0, minValue=0, maxValue=max(0, num_frames-1),
                                 style=wx.SL_HORIZONTAL | wx.SL_LABELS)
         self.slider.Bind(wx.EVT_SLIDER, self.on_slider)
+        self.__scrub_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.on_scrub_settled, self.__scrub_timer)
         vbox.Add(self.slider, 0, wx.EXPAND | wx.ALL, 10)
 
         main_panel.SetSizer(vbox)
 
         self.Bind(wx.EVT_CHAR_HOOK, self.on_key_down)
         self.Bind(wx.EVT_SHOW, self.on_show)
+        self.Bind(EVT_FRAME_PREFETCHED, self.on_frame_prefetched)
+        self.Bind(wx.EVT_WINDOW_DESTROY, self.on_destroy)
 
-    def get_frame(self, index: int, rotation_angle: int = 0):
+    def decode_frame(self, index: int) -> np.ndarray | None:
+        """Decode the unrotated BGR frame at index. Always called with the decode lock held."""
         raise NotImplementedError
 
+    def get_source_frame(self, index: int) -> np.ndarray | None:
+        """Get the full-resolution unrotated BGR frame at index, decoding it at most once.
+
+        Only tracking and exports need full-resolution pixels; display goes through get_display_frame.
+        """
+        with self._decode_lock:
+            img = self._frame_cache.get(index)
+            if img is None:
+                img = self.decode_frame(index)
+                if img is not None:
+                    self._frame_cache.put(index, img)
+                    self._frame_sizes[index] = (img.shape[1], img.shape[0])
+            return img
+
+    def get_frame(self, index: int, rotation_angle: int = 0) -> np.ndarray | None:
+        """Get a full-resolution rotated RGB copy of the frame at index."""
+        img = self.get_source_frame(index)
+        if img is None:
+            return None
+        return rotate_image(cv2.cvtColor(img, cv2.COLOR_BGR2RGB), rotation_angle)
+
+    def get_display_frame(self, index: int, rotation_angle: int, max_size: ImageSize) -> np.ndarray | None:
+        """Get a rotated RGB copy of the frame at index scaled to fit max_size, cached per size."""
+        key = (index, rotation_angle % 360, max_size)
+        img = self._display_cache.get(key)
+        if img is None:
+            source = self.get_source_frame(index)
+            if source is None:
+                return None
+            img = make_display_proxy(source, rotation_angle, max_size)
+            self._display_cache.put(key, img)
+        return img
+
+    def is_frame_ready(self, index: int) -> bool:
+        """Check whether the frame can be displayed without decoding on the UI thread."""
+        display_size = self._display_size
+        if display_size is None:
+            return index in self._frame_cache
+        return (index, self._rotation_angle % 360, display_size) in self._display_cache
+
+    def __prefetch_frame(self, index: int) -> np.ndarray | None:
+        display_size = self._display_size
+        if display_size is None:
+            return self.get_source_frame(index)
+        return self.get_display_frame(index, self._rotation_angle, display_size)
+
+    def start_prefetcher(self) -> None:
+        """Start a background worker decoding frames around the current index into the frame store."""
+        self._prefetcher = FramePrefetcher(
+            self.__prefetch_frame, self.is_frame_ready, self.num_frames, self.__post_frame_prefetched
+        )
+        self._prefetcher.start()
+
+    def __post_frame_prefetched(self, index: int) -> None:
+        # Called on the prefetch thread, so hand the result over to the UI thread
+        try:
+            wx.PostEvent(self, FramePrefetchedEvent(self, index))
+        except RuntimeError:
+            pass  # Frame already destroyed
+
+    def on_frame_prefetched(self, event: FramePrefetchedEvent) -> None:
+        if self._display_pending and event.index == self._current_index:
+            self.display_image()
+
+    def on_destroy(self, event: wx.WindowDestroyEvent) -> None:
+        if event.GetEventObject() is self:
+            if self._prefetcher is not None:
+                self._prefetcher.stop()
+                self._prefetcher = None
+            self._tracking_pool.shutdown(wait=False, cancel_futures=True)
+        event.Skip()
+
+    def show_current_frame(self) -> None:
+        """Display the current frame, deferring to the prefetcher if it still needs decoding."""
+        if self._prefetcher is not None and not self.is_frame_ready(self._current_index):
+            self._display_pending = True
+            self.slider.SetValue(self._current_index)
+            self._prefetcher.prefetch_around(self._current_index)
+            return
+        self.display_image()
+
     def __get_frame_boxes(self, index: int) -> List[BoxData]:
         """Get the boxes for the current frame index."""
-        fb = self.__frame_boxes
-        if not index in fb:
-            fb[index] = []
-
-        return fb[index]
+        return self.__frame_boxes.frame(index)
 
     def display_image(self):
-        img = self.get_frame(self._current_index, self._rotation_angle)
-        if img is None:
-            return
+        self._display_pending = False
         panel_size = self.__image_panel.GetSize()
         if panel_size.GetWidth() < 10 or panel_size.GetHeight() < 10:
             return  # Panel not yet sized, skip
+        self._display_size = (panel_size.GetWidth(), panel_size.GetHeight())
 
-        self.__image_panel.set_image(img, self._rotation_angle)
-        self.__image_panel.boxes = self.__current_boxes
+        cache_key = (self._current_index, self._rotation_angle % 360, self._display_size)
+        if not self.__image_panel.show_cached_image(cache_key):
+            img = self.get_display_frame(self._current_index, self._rotation_angle, self._display_size)
+            if img is None:
+                return
+            source_size = rotated_size(self._frame_sizes[self._current_index], self._rotation_angle)
+            self.__image_panel.set_image(img, self._rotation_angle, source_size, cache_key)
+        self.__image_panel.set_frame_boxes(self._current_index, self.__current_boxes)
 
         frame_boxes = self.__get_frame_boxes(self._current_index)
         self.tag_panel.update_boxes(frame_boxes)
+        self.tag_panel.Enable()
 
         self.__button_panel.set_prev_enabled(self._current_index > 0)
         self.__button_panel.set_next_enabled(self._current_index < self.num_frames)
@@ -214,14 +289,21 @@ class ScrubberFrame(wx.Frame):
         self.slider.SetValue(self._current_index)
         self.Refresh()
 
+        if self._prefetcher is not None:
+            self._prefetcher.prefetch_around(self._current_index)
+
     def on_resize(self, event):
-        self.display_image()
+        # A window drag sends a stream of size events, so only rescale once it stops
+        self.__resize_timer.StartOnce(RESIZE_SETTLE_MS)
         event.Skip()
 
+    def on_resize_settled(self, event: wx.TimerEvent) -> None:
+        self.display_image()
+
     def on_prev(self, event):
         if self._current_index > 0:
             self._current_index -= 1
-            self.display_image()
+            self.show_current_frame()
 
     def frame_has_boxes(self, index: int) -> bool:
         """Check if the current frame has boxes."""
@@ -229,35 +311,90 @@ class ScrubberFrame(wx.Frame):
 
     def on_next(self, event):
         if self._current_index < self.num_frames - 1:
-            next_index = self._current_index + 1
+            current_index = self._current_index
+            next_index = current_index + 1
 
             current_frame: np.ndarray | None = None
             next_frame: np.ndarray | None = None
-            if not self.frame_has_boxes(next_index) and self._current_index in self.__frame_boxes:
-                # locate boxes automatically
-                current_frame = self.get_frame(self._current_index, self._rotation_angle)
-                next_frame = self.get_frame(next_index, self._rotation_angle)
+            if not self.frame_has_boxes(next_index) and current_index in self.__frame_boxes:
+                # locate boxes automatically, sharing the decoded frames with display_image below
+                # Boxes are stored in unrotated source coordinates, so track on unrotated frames
+                current_frame = self.get_source_frame(current_index)
+                next_frame = self.get_source_frame(next_index)
 
             frame_boxes = self.__current_boxes
 
             self._current_index += 1
             if next_frame is not None and current_frame is not None:
-                found_boxes: list[BoxData] = []
-                for box in frame_boxes:
-                    new_bbox = self.find_object_in_next_frame(current_frame, next_frame, box)
-                    if new_bbox is not None:
-                        getLog().debug(f'Found new coordinates for box: {box}->{new_bbox}')
-                        found_boxes.append(new_bbox)
-
-                if next_index not in self.__frame_boxes:
-                    self.__frame_boxes[next_index] = []
-                self.__frame_boxes[next_index].extend(found_boxes)
+                found_boxes = self._tracker.track_boxes(
+                    current_index, current_frame, next_index, next_frame, frame_boxes, self._tracking_pool
+                )
+                getLog().debug(f'Found new coordinates for {len(found_boxes)}/{len(frame_boxes)} boxes '
+                               f'in {self._tracker.last_frame_seconds * 1000:.1f}ms with {self._tracker.name}')
+
+                next_boxes = self.__get_frame_boxes(next_index)
+                start = len(next_boxes)
+                next_boxes.extend(found_boxes)
+                if found_boxes:
+                    # Consecutive frames tracked by Next chain into one step, so a bad run undoes at once
+                    self.__history.record_batch(EditBatch(
+                        [(next_index, AddBox(box, start + i)) for i, box in enumerate(found_boxes)],
+                        is_propagation=True
+                    ))
+                self.journal_frame(next_index)
 
             self.display_image()
 
     def on_slider(self, event):
         self._current_index = self.slider.GetValue()
-        self.display_image()
+        if self._keyframe_index is None or self.is_frame_ready(self._current_index):
+            self.__scrub_timer.Stop()
+            self.show_current_frame()
+            return
+
+        # While the slider is moving only show the nearest keyframe, which decodes without
+        # walking a GOP. The exact frame is decoded once the slider settles.
+        self.display_scrub_preview(self._keyframe_index.keyframe_at_or_before(self._current_index))
+        self.__scrub_timer.StartOnce(SCRUB_SETTLE_MS)
+
+    def on_scrub_settled(self, event: wx.TimerEvent) -> None:
+        self.show_current_frame()
+
+    def display_scrub_preview(self, index: int) -> None:
+        """Show frame index and its boxes as a stand-in for the current frame while scrubbing.
+
+        The preview is read-only until the slider settles: its boxes belong to another frame than
+        the slider's, so edits made to them would be saved against the wrong frame.
+        """
+        if self._display_size is None:
+            return
+        img = self.get_display_frame(index, self._rotation_angle, self._display_size)
+        if img is None:
+            return
+        source_size = rotated_size(self._frame_sizes[index], self._rotation_angle)
+        self.__image_panel.set_image(img, self._rotation_angle, source_size)
+        self.__image_panel.set_frame_boxes(index, list(self.__get_frame_boxes(index)), read_only=True)
+        self.tag_panel.Disable()
+
+    @property
+    def keyframe_index(self) -> KeyframeIndex | None:
+        return self._keyframe_index
+
+    @keyframe_index.setter
+    def keyframe_index(self, index: KeyframeIndex | None) -> None:
+        """Set the keyframe index, enabling keyframe previews while scrubbing."""
+        self._keyframe_index = index
+
+    @property
+    def tracker_name(self) -> str:
+        return self._tracker.name
+
+    @tracker_name.setter
+    def tracker_name(self, name: str) -> None:
+        """Switch the tracker backend used by Next for the rest of the session; see tracker.TRACKERS."""
+        if name != self._tracker.name:
+            self._tracker = create_tracker(name)
+            getLog().info(f'Tracking boxes with {name}')
 
     def on_rotate_cw(self, event: wx.CommandEvent) -> None:
         self._rotation_angle = (self._rotation_angle + 90) % 360
@@ -281,13 +418,36 @@ class ScrubberFrame(wx.Frame):
         shift_down = event.ShiftDown()
         # Ctrl+Z for undo
         if control_down and keycode == ord('Z') and not shift_down:
-            self.__image_panel.undo()
+            self.undo()
         # Ctrl+Shift+Z for redo
         elif control_down and keycode == ord('Z') and shift_down:
-            self.__image_panel.redo()
+            self.redo()
         else:
             event.Skip()
 
+    def undo(self) -> None:
+        batch = self.__history.undo(self.__get_frame_boxes)
+        if batch is not None:
+            getLog().debug(f'Undid {len(batch.edits)} edits in frames {batch.first_frame}-{batch.last_frame}')
+            self.__after_history_change(batch)
+
+    def redo(self) -> None:
+        batch = self.__history.redo(self.__get_frame_boxes)
+        if batch is not None:
+            getLog().debug(f'Redid {len(batch.edits)} edits in frames {batch.first_frame}-{batch.last_frame}')
+            self.__after_history_change(batch)
+
+    def __after_history_change(self, batch: EditBatch) -> None:
+        """Journal the frames an undo or redo changed, and go back to the first of them if it is not showing."""
+        frames = batch.frames
+        for index in frames:
+            self.journal_frame(index)
+        if self._current_index not in frames:
+            self._current_index = batch.first_frame
+            self.show_current_frame()
+        else:
+            self.display_image()
+
     @property
     def __current_boxes(self) -> List[BoxData]:
         """Get the boxes for the current frame index."""
@@ -309,17 +469,42 @@ class ScrubberFrame(wx.Frame):
             raise ValueError("Index out of bounds")
 
     def count_boxes(self):
-        count = 0
-        for box_list in self.__frame_boxes.values():
-            count += len(box_list)
-        """Count the number of boxes in the current frame."""
-        return count
+        """Count the number of boxes in all frames."""
+        return self.__frame_boxes.box_count()
+
+    def on_frame_boxes_changed(self, event: wx.CommandEvent) -> None:
+        """Journal the shown frame's boxes after a box in it is added, edited or removed."""
+        if isinstance(event, BoxUpdatedEvent) and not event.boxes_changed:
+            event.Skip()
+            return
+        # The panel's frame, not the slider's, as the two differ while a keyframe preview is shown
+        index = self.__image_panel.frame_index
+        if isinstance(event, BoxUpdatedEvent) and event.boxes is not self.__get_frame_boxes(index):
+            # Keep the frame's list in step with the panel's, should the panel have replaced it
+            self.__frame_boxes[index] = event.boxes
+        elif isinstance(event, BoxEditedEvent):
+            if event.old_tags is not None:
+                self.__image_panel.record_tags_changed(event.box, event.old_tags)
+            # The panel reuses its last painting until refreshed, so redraw the edited label
+            self.__image_panel.Refresh()
+        self.journal_frame(index)
+        event.Skip()
+
+    def journal_frame(self, index: int) -> None:
+        """Append a changed frame's boxes to the journal, folding the journal into the snapshot now and then."""
+        self.__frame_boxes.mark_dirty(index)
+        if self.__journal is None:
+            return
+        self.__journal.record_frame(index, self.__get_frame_boxes(index))
+        if self.__journal.needs_compaction:
+            self.__journal.compact(self.__frame_boxes)
 
     def on_close(self, event):
-        # Save boxes before exiting
-        count = self.count_boxes()
-        save_boxes_to_file(self.__box_data_filename, self.__frame_boxes)
-        getLog().info(f'{count} boxes saved to {self.__box_data_filename}')
+        # Save boxes before exiting, unless nothing changed since they were last saved
+        if self.__journal is not None and (self.__journal.pending or self.__frame_boxes.dirty_frames):
+            count = self.count_boxes()
+            self.__journal.compact(self.__frame_boxes)
+            getLog().info(f'{count} boxes saved to {self.__box_data_filename}')
         event.Skip()  # Continue closing
 
     def on_box_selected(self, event: BoxSelectedEvent) -> None:
@@ -327,57 +512,12 @@ class ScrubberFrame(wx.Frame):
         getLog().debug(f'Selected box {selected_box.coords} with tags {selected_box.tags}')
         # self.tag_panel.set_selected(event.box)
 
-    @staticmethod
     def find_object_in_next_frame(
+        self,
+        prev_index: int,
         prev_frame: np.ndarray,
+        next_index: int,
         next_frame: np.ndarray,
         bbox: BoxData
     ) -> BoxData | None:
-        x: int
-        y: int
-        w: int
-        h: int
-        x, y, w, h = bbox.coords
-        template: np.ndarray = prev_frame[y:y + h, x:x + w]
-
-        orb: cv2.ORB = cv2.ORB_create()
-        kp1: list[cv2.KeyPoint]
-        des1: np.ndarray | None
-        kp1, des1 = orb.detectAndCompute(template, None)
-        kp2: list[cv2.KeyPoint]
-        des2: np.ndarray | None
-        kp2, des2 = orb.detectAndCompute(next_frame, None)
-
-        if des1 is None or des2 is None or len(kp1) == 0 or len(kp2) == 0:
-            return None
-
-        bf: cv2.BFMatcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
-        matches: list[cv2.DMatch] = bf.match(des1, des2)
-        matches = sorted(matches, key=lambda m: m.distance)
-
-        # src_pts: np.ndarray = np.float32([kp1[m.queryIdx].pt for m in matches]).reshape(-1, 1, 2)
-        # dst_pts: np.ndarray = np.float32([kp2[m.trainIdx].pt for m in matches]).reshape(-1, 1, 2)
-        src_pts = np.float32([np.array(kp1[m.queryIdx].pt) for m in matches]).reshape(-1, 1, 2)
-        dst_pts = np.float32([np.array(kp2[m.trainIdx].pt) - np.array([x, y]) for m in matches]).reshape(-1, 1, 2)
-
-        if src_pts.shape[0] >= 3:
-            M: np.ndarray | None
-            mask: np.ndarray | None
-            M, mask = cv2.estimateAffinePartial2D(src_pts, dst_pts)
-            if M is not None:
-                corners: np.ndarray = np.float32([
-                    [x, y],
-                    [x + w, y],
-                    [x + w, y + h],
-                    [x, y + h]
-                ]).reshape(-1, 1, 2)
-                new_corners: np.ndarray = cv2.transform(corners, M)
-                new_bbox: tuple[int, int, int, int] = cv2.boundingRect(new_corners)
-
-                new_data = BoxData(
-                    coords=(new_bbox[0], new_bbox[1], new_bbox[2], new_bbox[3]),
-                    tags=copy(bbox.tags),
-                    source='automatic'
-                )
-                return new_data
-        return None
\ No newline at end of file
+        return self._tracker.track(prev_index, prev_frame, next_index, next_frame, bbox)
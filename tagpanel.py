@@ -103,7 +103,6 @@ class TagPanel(ScrolledPanel, wx.PyEventBinder):
                 # If no existing panel found, create a new one
                 box_tag_panel = BoxTagPanelEdit(self, box)
                 self.__box_panels.append(box_tag_panel)
-                box_tag_panel.Bind(EVT_BOX_EDITED, self.__on_box_edited)
                 box_tag_panel.Bind(wx.EVT_PAINT, self.__on_tag_panel_painted)
 
             self.__box_sizer.Add(box_tag_panel, 0, wx.ALIGN_LEFT | wx.ALL, 2)
@@ -177,6 +176,7 @@ class TagPanel(ScrolledPanel, wx.PyEventBinder):
         """Handle box edited event."""
         getLog().info(f'Box {event.box} edited in {event.GetEventObject()}')
         self.update_box(event.box)
+        event.Skip()  # The frame journals the edit
 
 
     def __on_boxes_updated(self, event: BoxUpdatedEvent) -> None:
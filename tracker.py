@@ -0,0 +1,474 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from copy import copy
+from typing import Any, Callable
+
+import cv2
+import numpy as np
+
+from boxdata import BoxData, Coordinate
+from boxio import merge_duplicate_boxes
+from motion import MotionGate
+
+FrameIndex = int
+FrameFeatures = tuple[np.ndarray, np.ndarray | None]  # (Nx2 keypoint positions, Nx32 ORB descriptors)
+
+ORB_FEATURES: int = 5000  # Keypoints per frame; whole frames need far more than the 500 default
+KEYPOINT_CACHE_SIZE: int = 8  # Frames whose keypoints or grayscale copies are kept, enough for stepping back and forth
+DEFAULT_SEARCH_MARGIN: float = 1.0  # Search window padding around a box, in multiples of its size
+MIN_MATCHES: int = 3  # estimateAffinePartial2D needs at least this many point pairs
+TEMPLATE_SEARCH_MARGIN: float = 0.25  # Smaller than ORB's, as correlation cost grows with the window area
+TEMPLATE_MIN_SCORE: float = 0.5  # Normalised correlation below which a template match counts as lost
+FLOW_GRID_POINTS: int = 5  # Points per side of the grid tracked by optical flow, including the box corners
+FLOW_MAX_ERROR: float = 1.0  # Forward-backward optical flow error, in pixels, above which a point is dropped
+FLOW_WINDOW: tuple[int, int] = (21, 21)  # Lucas-Kanade window size at each pyramid level
+FLOW_LEVELS: int = 3  # Pyramid levels above full resolution, each halving the size
+OPENCV_TRACKER_WINDOW: int = 8  # Frames away from the one being tracked into beyond which OpenCV trackers are forgotten
+DEFAULT_TRACKER: str = 'orb'
+
+
+def dmatch_arrays(matches: list[cv2.DMatch]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Unpack matches into (queryIdx, trainIdx, distance) arrays in one pass each."""
+    count = len(matches)
+    query_idx = np.fromiter((m.queryIdx for m in matches), dtype=np.intp, count=count)
+    train_idx = np.fromiter((m.trainIdx for m in matches), dtype=np.intp, count=count)
+    distance = np.fromiter((m.distance for m in matches), dtype=np.float32, count=count)
+    return query_idx, train_idx, distance
+
+
+def box_corners(coords: Coordinate) -> np.ndarray:
+    x, y, w, h = coords
+    return np.float32([[x, y], [x + w, y], [x + w, y + h], [x, y + h]]).reshape(-1, 1, 2)
+
+
+def moved_box(bbox: BoxData, coords: Coordinate) -> BoxData:
+    """Make the automatic box for where bbox was found in the next frame."""
+    x, y, w, h = coords
+    return BoxData(coords=(int(x), int(y), int(w), int(h)), tags=copy(bbox.tags), source='automatic')
+
+
+def estimate_moved_box(bbox: BoxData, src_pts: np.ndarray, dst_pts: np.ndarray) -> BoxData | None:
+    """Move bbox by the similarity transform that best maps src_pts onto dst_pts."""
+    if src_pts.shape[0] < MIN_MATCHES:
+        return None
+    M: np.ndarray | None
+    M, _ = cv2.estimateAffinePartial2D(src_pts.reshape(-1, 1, 2), dst_pts.reshape(-1, 1, 2))
+    if M is None:
+        return None
+    new_corners: np.ndarray = cv2.transform(box_corners(bbox.coords), M)
+    return moved_box(bbox, cv2.boundingRect(new_corners))
+
+
+def to_gray(frame: np.ndarray) -> np.ndarray:
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+
+class Tracker:
+    """Finds boxes from one frame in the next.
+
+    Subclasses implement prepare_frame, whose result is computed once per frame and kept in an
+    LRU cache, and track. Safe to call from several threads at once. The time taken by each
+    track_boxes call is recorded so backends can be compared on real footage.
+
+    If motion_gate is set, boxes are shifted without tracking them whenever it finds the scene
+    has barely moved, and frames are only prepared when some box still needs tracking.
+    If merge_iou is set, boxes that end up overlapping by that much or more are merged, so boxes
+    drifting onto the same object do not pile up as copies frame after frame.
+    """
+    name: str = ''
+    motion_gate: MotionGate | None = None
+    merge_iou: float | None = None
+    __frame_data: OrderedDict[FrameIndex, Any]
+    __frame_data_lock: threading.Lock
+    __cache_size: int
+    __search_margin: float
+    __last_frame_seconds: float
+    __total_seconds: float
+    __frames_tracked: int
+
+    def __init__(self, search_margin: float = DEFAULT_SEARCH_MARGIN, cache_size: int = KEYPOINT_CACHE_SIZE):
+        self.__frame_data = OrderedDict()
+        self.__frame_data_lock = threading.Lock()
+        self.__cache_size = cache_size
+        self.__search_margin = search_margin
+        self.__last_frame_seconds = 0.0
+        self.__total_seconds = 0.0
+        self.__frames_tracked = 0
+
+    def prepare_frame(self, frame: np.ndarray) -> Any:
+        """Compute whatever the tracker needs from a whole frame, such as keypoints or a grayscale copy."""
+        raise NotImplementedError
+
+    def frame_data(self, index: FrameIndex, frame: np.ndarray) -> Any:
+        """Get the prepared data for a frame, preparing it only on first use."""
+        # Held during preparation too, so concurrent callers for the same frame wait rather than repeat it
+        with self.__frame_data_lock:
+            data = self.__frame_data.get(index)
+            if data is not None:
+                self.__frame_data.move_to_end(index)
+                return data
+
+            data = self.prepare_frame(frame)
+            self.__frame_data[index] = data
+            while len(self.__frame_data) > self.__cache_size:
+                self.__frame_data.popitem(last=False)
+            return data
+
+    def clear(self) -> None:
+        with self.__frame_data_lock:
+            self.__frame_data.clear()
+        if self.motion_gate is not None:
+            self.motion_gate.clear()
+
+    def search_window(self, coords: Coordinate) -> tuple[float, float, float, float]:
+        """Get the region of the next frame to look for a box in."""
+        x, y, w, h = coords
+        pad = self.__search_margin * max(w, h)
+        return x - pad, y - pad, w + 2 * pad, h + 2 * pad
+
+    @property
+    def last_frame_seconds(self) -> float:
+        """Time the last track_boxes call took."""
+        return self.__last_frame_seconds
+
+    @property
+    def mean_frame_seconds(self) -> float:
+        """Average time per track_boxes call since the tracker was created."""
+        return self.__total_seconds / self.__frames_tracked if self.__frames_tracked else 0.0
+
+    def track(
+        self,
+        prev_index: FrameIndex,
+        prev_frame: np.ndarray,
+        next_index: FrameIndex,
+        next_frame: np.ndarray,
+        bbox: BoxData
+    ) -> BoxData | None:
+        """Find where bbox from prev_frame has moved to in next_frame."""
+        raise NotImplementedError
+
+    def track_boxes(
+        self,
+        prev_index: FrameIndex,
+        prev_frame: np.ndarray,
+        next_index: FrameIndex,
+        next_frame: np.ndarray,
+        boxes: list[BoxData],
+        executor: Executor | None = None
+    ) -> list[BoxData]:
+        """Track every box into next_frame, fanning the boxes out over executor if given.
+
+        Boxes that could not be found are left out; the rest keep the order of boxes.
+        """
+        started = time.perf_counter()
+        if self.motion_gate is not None:
+            shifted = self.motion_gate.shift_boxes(prev_index, prev_frame, next_index, next_frame, boxes)
+        else:
+            shifted = [None] * len(boxes)
+        to_track = [box for box, shifted_box in zip(boxes, shifted) if shifted_box is None]
+
+        tracked: list[BoxData | None] = []
+        if to_track:
+            # Prepare both frames up front so the workers only ever read the frame cache
+            self.frame_data(prev_index, prev_frame)
+            self.frame_data(next_index, next_frame)
+
+            def track_box(box: BoxData) -> BoxData | None:
+                return self.track(prev_index, prev_frame, next_index, next_frame, box)
+
+            if executor is None or len(to_track) < 2:
+                tracked = list(map(track_box, to_track))
+            else:
+                tracked = list(executor.map(track_box, to_track))
+
+        tracked_iter = iter(tracked)
+        found = [shifted_box if shifted_box is not None else next(tracked_iter) for shifted_box in shifted]
+        found_boxes = [box for box in found if box is not None]
+        if self.merge_iou is not None and len(found_boxes) > 1:
+            found_boxes = merge_duplicate_boxes(found_boxes, self.merge_iou)
+
+        self.__last_frame_seconds = time.perf_counter() - started
+        self.__total_seconds += self.__last_frame_seconds
+        self.__frames_tracked += 1
+        return found_boxes
+
+
+class OrbTracker(Tracker):
+    """Finds boxes by matching ORB features and fitting a similarity transform to the matches.
+
+    Each box is matched only against keypoints in a window around its old position. The most
+    robust backend to large motion, rotation and scale, and the most expensive per frame.
+    """
+    name = 'orb'
+    __orb: cv2.ORB
+    __matchers: threading.local  # BFMatchers are not shared between threads
+    __ratio_test: float | None
+    __max_matches: int | None
+
+    def __init__(
+        self,
+        search_margin: float = DEFAULT_SEARCH_MARGIN,
+        cache_size: int = KEYPOINT_CACHE_SIZE,
+        ratio_test: float | None = None,
+        max_matches: int | None = None
+    ):
+        """
+        ratio_test: if set, match with Lowe's ratio test at this threshold instead of cross-checking.
+        max_matches: if set, only the best max_matches matches are used to estimate the motion.
+        """
+        super().__init__(search_margin, cache_size)
+        self.__orb = cv2.ORB_create(nfeatures=ORB_FEATURES)
+        self.__matchers = threading.local()
+        self.__ratio_test = ratio_test
+        self.__max_matches = max_matches
+
+    def prepare_frame(self, frame: np.ndarray) -> FrameFeatures:
+        keypoints, descriptors = self.__orb.detectAndCompute(frame, None)
+        points = cv2.KeyPoint_convert(keypoints).reshape(-1, 2) if keypoints else np.empty((0, 2), np.float32)
+        return points, descriptors
+
+    def frame_features(self, index: FrameIndex, frame: np.ndarray) -> FrameFeatures:
+        """Get the keypoints and descriptors for a frame, detecting them only on first use."""
+        return self.frame_data(index, frame)
+
+    def __matcher(self, cross_check: bool) -> cv2.BFMatcher:
+        """Get this thread's matcher, creating it on first use."""
+        name = 'cross_check' if cross_check else 'knn'
+        matcher = getattr(self.__matchers, name, None)
+        if matcher is None:
+            matcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=cross_check)
+            setattr(self.__matchers, name, matcher)
+        return matcher
+
+    @staticmethod
+    def points_in_rect(points: np.ndarray, x: float, y: float, w: float, h: float) -> np.ndarray:
+        """Get the indices of the points that lie inside the rect."""
+        inside = (points[:, 0] >= x) & (points[:, 0] < x + w) & (points[:, 1] >= y) & (points[:, 1] < y + h)
+        return np.flatnonzero(inside)
+
+    def match(self, src_descriptors: np.ndarray, dst_descriptors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Match descriptors, returning the indices of the matched src and dst descriptors."""
+        if self.__ratio_test is None:
+            query_idx, train_idx, distance = dmatch_arrays(self.__matcher(True).match(src_descriptors, dst_descriptors))
+        else:
+            pairs = self.__matcher(False).knnMatch(src_descriptors, dst_descriptors, k=2)
+            pairs = [pair for pair in pairs if len(pair) == 2]
+            query_idx, train_idx, distance = dmatch_arrays([pair[0] for pair in pairs])
+            _, _, second_distance = dmatch_arrays([pair[1] for pair in pairs])
+            keep = distance < self.__ratio_test * second_distance
+            query_idx, train_idx, distance = query_idx[keep], train_idx[keep], distance[keep]
+
+        if self.__max_matches is not None and len(distance) > self.__max_matches:
+            best = np.argpartition(distance, self.__max_matches)[:self.__max_matches]
+            query_idx, train_idx = query_idx[best], train_idx[best]
+        return query_idx, train_idx
+
+    def track(
+        self,
+        prev_index: FrameIndex,
+        prev_frame: np.ndarray,
+        next_index: FrameIndex,
+        next_frame: np.ndarray,
+        bbox: BoxData
+    ) -> BoxData | None:
+        x, y, w, h = bbox.coords
+        prev_points, prev_descriptors = self.frame_features(prev_index, prev_frame)
+        next_points, next_descriptors = self.frame_features(next_index, next_frame)
+        if prev_descriptors is None or next_descriptors is None:
+            return None
+
+        src_idx = self.points_in_rect(prev_points, x, y, w, h)
+        dst_idx = self.points_in_rect(next_points, *self.search_window(bbox.coords))
+        if len(src_idx) == 0 or len(dst_idx) == 0:
+            return None
+
+        query_idx, train_idx = self.match(prev_descriptors[src_idx], next_descriptors[dst_idx])
+        return estimate_moved_box(bbox, prev_points[src_idx[query_idx]], next_points[dst_idx[train_idx]])
+
+
+class TemplateTracker(Tracker):
+    """Finds boxes by correlating the box's pixels against a window around its old position.
+
+    Only handles translation, but is far cheaper than ORB when boxes move a few pixels per frame.
+    """
+    name = 'template'
+    __min_score: float
+
+    def __init__(
+        self,
+        search_margin: float = TEMPLATE_SEARCH_MARGIN,
+        cache_size: int = KEYPOINT_CACHE_SIZE,
+        min_score: float = TEMPLATE_MIN_SCORE
+    ):
+        super().__init__(search_margin, cache_size)
+        self.__min_score = min_score
+
+    def prepare_frame(self, frame: np.ndarray) -> np.ndarray:
+        return to_gray(frame)
+
+    def track(
+        self,
+        prev_index: FrameIndex,
+        prev_frame: np.ndarray,
+        next_index: FrameIndex,
+        next_frame: np.ndarray,
+        bbox: BoxData
+    ) -> BoxData | None:
+        prev_gray: np.ndarray = self.frame_data(prev_index, prev_frame)
+        next_gray: np.ndarray = self.frame_data(next_index, next_frame)
+        x, y, w, h = (int(v) for v in bbox.coords)
+
+        # Match only the part of the box inside the frame, then move the whole box by as much
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, prev_gray.shape[1]), min(y + h, prev_gray.shape[0])
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+        template = prev_gray[y0:y1, x0:x1]
+
+        sx, sy, sw, sh = self.search_window((x0, y0, x1 - x0, y1 - y0))
+        wx0, wy0 = max(int(sx), 0), max(int(sy), 0)
+        wx1, wy1 = min(int(sx + sw), next_gray.shape[1]), min(int(sy + sh), next_gray.shape[0])
+        window = next_gray[wy0:wy1, wx0:wx1]
+        if window.shape[0] < template.shape[0] or window.shape[1] < template.shape[1]:
+            return None
+
+        scores = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+        _, best_score, _, (bx, by) = cv2.minMaxLoc(scores)
+        if not best_score >= self.__min_score:  # Also rejects NaN from featureless templates
+            return None
+        return moved_box(bbox, (x + wx0 + bx - x0, y + wy0 + by - y0, w, h))
+
+
+class OpticalFlowTracker(Tracker):
+    """Finds boxes by following a grid of points over the box with pyramidal Lucas-Kanade optical flow.
+
+    Points whose backward flow does not return to where they started are dropped before fitting a
+    similarity transform, so the box follows rotation and scale as well as translation.
+    """
+    name = 'flow'
+
+    def prepare_frame(self, frame: np.ndarray) -> np.ndarray:
+        return to_gray(frame)
+
+    @staticmethod
+    def grid_points(coords: Coordinate) -> np.ndarray:
+        """Get FLOW_GRID_POINTS x FLOW_GRID_POINTS points spread over the box, including its corners."""
+        x, y, w, h = coords
+        xs = np.linspace(x, x + w, FLOW_GRID_POINTS, dtype=np.float32)
+        ys = np.linspace(y, y + h, FLOW_GRID_POINTS, dtype=np.float32)
+        return np.stack(np.meshgrid(xs, ys), axis=-1).reshape(-1, 1, 2)
+
+    def track(
+        self,
+        prev_index: FrameIndex,
+        prev_frame: np.ndarray,
+        next_index: FrameIndex,
+        next_frame: np.ndarray,
+        bbox: BoxData
+    ) -> BoxData | None:
+        prev_gray: np.ndarray = self.frame_data(prev_index, prev_frame)
+        next_gray: np.ndarray = self.frame_data(next_index, next_frame)
+        src_pts = self.grid_points(bbox.coords)
+
+        dst_pts, status, _ = cv2.calcOpticalFlowPyrLK(
+            prev_gray, next_gray, src_pts, None, winSize=FLOW_WINDOW, maxLevel=FLOW_LEVELS
+        )
+        back_pts, back_status, _ = cv2.calcOpticalFlowPyrLK(
+            next_gray, prev_gray, dst_pts, None, winSize=FLOW_WINDOW, maxLevel=FLOW_LEVELS
+        )
+        error = np.linalg.norm((src_pts - back_pts).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (error < FLOW_MAX_ERROR)
+        return estimate_moved_box(bbox, src_pts[good], dst_pts[good])
+
+
+class OpenCVTracker(Tracker):
+    """Wraps one of OpenCV contrib's single-object trackers, such as KCF or CSRT.
+
+    These trackers learn the box's appearance over several frames, so each box's tracker is kept
+    and continued when the box it found is tracked on into the frame after.
+    """
+    __create: Callable[[], Any]
+    __trackers: dict[tuple[FrameIndex, Coordinate, tuple[str, ...]], Any]
+    __trackers_lock: threading.Lock
+    __tracker_window: int
+
+    def __init__(
+        self,
+        name: str,
+        create: Callable[[], Any],
+        cache_size: int = KEYPOINT_CACHE_SIZE,
+        tracker_window: int = OPENCV_TRACKER_WINDOW
+    ):
+        super().__init__(cache_size=cache_size)
+        self.name = name
+        self.__create = create
+        self.__tracker_window = tracker_window
+        self.__trackers = {}
+        self.__trackers_lock = threading.Lock()
+
+    def prepare_frame(self, frame: np.ndarray) -> np.ndarray:
+        return frame
+
+    def clear(self) -> None:
+        super().clear()
+        with self.__trackers_lock:
+            self.__trackers.clear()
+
+    def track(
+        self,
+        prev_index: FrameIndex,
+        prev_frame: np.ndarray,
+        next_index: FrameIndex,
+        next_frame: np.ndarray,
+        bbox: BoxData
+    ) -> BoxData | None:
+        x, y, w, h = (int(v) for v in bbox.coords)
+        if w <= 0 or h <= 0:
+            return None
+        with self.__trackers_lock:
+            tracker = self.__trackers.pop((prev_index, (x, y, w, h), tuple(bbox.tags)), None)
+        if tracker is None:
+            tracker = self.__create()
+            tracker.init(prev_frame, (x, y, w, h))
+            # KCF's first update after init returns the box where it was initialised, which would leave
+            # every box a frame behind, so spend that update on the frame it was initialised on
+            tracker.update(prev_frame)
+
+        found, rect = tracker.update(next_frame)
+        if not found:
+            return None
+        new_box = moved_box(bbox, rect)
+        with self.__trackers_lock:
+            self.__trackers[(next_index, new_box.coords, tuple(new_box.tags))] = tracker
+            # Forget trackers whose boxes were edited or never tracked further
+            for key in [key for key in self.__trackers if abs(key[0] - next_index) > self.__tracker_window]:
+                del self.__trackers[key]
+        return new_box
+
+
+TRACKERS: dict[str, Callable[[], Tracker]] = {
+    OrbTracker.name: OrbTracker,
+    TemplateTracker.name: TemplateTracker,
+    OpticalFlowTracker.name: OpticalFlowTracker,
+}
+# The KCF and CSRT trackers are only in opencv-contrib-python
+if hasattr(cv2, 'TrackerKCF_create'):
+    TRACKERS['kcf'] = lambda: OpenCVTracker('kcf', cv2.TrackerKCF_create)
+if hasattr(cv2, 'TrackerCSRT_create'):
+    TRACKERS['csrt'] = lambda: OpenCVTracker('csrt', cv2.TrackerCSRT_create)
+
+
+def create_tracker(name: str = DEFAULT_TRACKER, gate_motion: bool = True) -> Tracker:
+    """Create a tracker backend by name, one of the keys of TRACKERS.
+
+    gate_motion: shift boxes instead of tracking them between frames where the scene barely moves.
+    """
+    factory = TRACKERS.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown tracker '{name}', expected one of: {', '.join(TRACKERS)}")
+    tracker = factory()
+    if gate_motion:
+        tracker.motion_gate = MotionGate()
+    return tracker
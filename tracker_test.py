@@ -0,0 +1,143 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from boxdata import BoxData
+from boxio import DUPLICATE_IOU_THRESHOLD
+from tracker import OrbTracker, TRACKERS, create_tracker
+
+
+def make_textured_frame(seed: int = 0, size: tuple[int, int] = (240, 320)) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (size[0] // 8, size[1] // 8), dtype=np.uint8)
+    gray = np.kron(small, np.ones((8, 8), dtype=np.uint8))
+    return np.dstack([gray, gray, gray])
+
+
+def shift_frame(frame: np.ndarray, dx: int, dy: int) -> np.ndarray:
+    return np.roll(np.roll(frame, dy, axis=0), dx, axis=1)
+
+
+class TestOrbTracker(unittest.TestCase):
+    def test_tracks_translated_box(self):
+        prev_frame = make_textured_frame()
+        next_frame = shift_frame(prev_frame, 6, 4)
+        box = BoxData((100, 80, 60, 50), ['pin'], 'user')
+
+        tracker = OrbTracker()
+        found = tracker.track(0, prev_frame, 1, next_frame, box)
+
+        self.assertIsNotNone(found)
+        x, y, w, h = found.coords
+        self.assertAlmostEqual(x, 106, delta=2)
+        self.assertAlmostEqual(y, 84, delta=2)
+        self.assertAlmostEqual(w, 60, delta=3)
+        self.assertAlmostEqual(h, 50, delta=3)
+        self.assertEqual(found.tags, ['pin'])
+        self.assertIsNot(found.tags, box.tags)
+        self.assertEqual(found.source, 'automatic')
+
+    def test_tracks_with_ratio_test_and_match_limit(self):
+        prev_frame = make_textured_frame()
+        next_frame = shift_frame(prev_frame, 6, 4)
+        box = BoxData((100, 80, 60, 50), ['pin'], 'user')
+
+        found = OrbTracker(ratio_test=0.8, max_matches=20).track(0, prev_frame, 1, next_frame, box)
+
+        self.assertIsNotNone(found)
+        self.assertAlmostEqual(found.coords[0], 106, delta=2)
+        self.assertAlmostEqual(found.coords[1], 84, delta=2)
+
+    def test_match_limit_keeps_best_matches(self):
+        tracker = OrbTracker(max_matches=5)
+        features, descriptors = tracker.frame_features(0, make_textured_frame())
+        query_idx, train_idx = tracker.match(descriptors, descriptors)
+        self.assertEqual(len(query_idx), 5)
+        self.assertTrue(np.array_equal(query_idx, train_idx))
+
+    def test_merge_iou_merges_boxes_tracked_onto_each_other(self):
+        prev_frame = make_textured_frame()
+        next_frame = shift_frame(prev_frame, 6, 4)
+        boxes = [BoxData((100, 80, 60, 50), ['pin'], 'user'), BoxData((100, 80, 60, 50), ['other'], 'user')]
+
+        self.assertEqual(len(OrbTracker().track_boxes(0, prev_frame, 1, next_frame, boxes)), 2)
+        tracker = OrbTracker()
+        tracker.merge_iou = DUPLICATE_IOU_THRESHOLD
+        found = tracker.track_boxes(0, prev_frame, 1, next_frame, boxes)
+        self.assertEqual([box.tags for box in found], [['pin', 'other']])
+
+    def test_track_boxes_in_parallel_keeps_box_order(self):
+        prev_frame = make_textured_frame()
+        next_frame = shift_frame(prev_frame, 6, 4)
+        boxes = [BoxData((40 + i * 60, 60, 40, 40), [f'pin-{i}'], 'user') for i in range(4)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            found = OrbTracker().track_boxes(0, prev_frame, 1, next_frame, boxes, executor)
+
+        self.assertEqual([box.tags for box in found], [box.tags for box in boxes])
+        for before, after in zip(boxes, found):
+            self.assertAlmostEqual(after.coords[0], before.coords[0] + 6, delta=2)
+            self.assertAlmostEqual(after.coords[1], before.coords[1] + 4, delta=2)
+
+    def test_frame_features_are_cached_per_frame(self):
+        tracker = OrbTracker()
+        frame = make_textured_frame()
+        first = tracker.frame_features(3, frame)
+        self.assertIs(tracker.frame_features(3, frame), first)
+
+    def test_blank_frames_find_nothing(self):
+        blank = np.zeros((120, 160, 3), dtype=np.uint8)
+        box = BoxData((10, 10, 30, 30), ['pin'], 'user')
+        self.assertIsNone(OrbTracker().track(0, blank, 1, blank, box))
+
+    def test_points_in_rect(self):
+        points = np.float32([[1, 1], [5, 5], [10, 10]])
+        self.assertEqual(list(OrbTracker.points_in_rect(points, 0, 0, 6, 6)), [0, 1])
+
+
+class TestTrackerBackends(unittest.TestCase):
+    def test_every_backend_tracks_translated_box(self):
+        prev_frame = make_textured_frame()
+        next_frame = shift_frame(prev_frame, 6, 4)
+        box = BoxData((100, 80, 60, 50), ['pin'], 'user')
+        for name in TRACKERS:
+            with self.subTest(tracker=name):
+                found = create_tracker(name).track_boxes(0, prev_frame, 1, next_frame, [box])
+                self.assertEqual(len(found), 1)
+                self.assertAlmostEqual(found[0].coords[0], 106, delta=3)
+                self.assertAlmostEqual(found[0].coords[1], 84, delta=3)
+                self.assertEqual(found[0].tags, ['pin'])
+
+    @unittest.skipUnless('csrt' in TRACKERS and 'kcf' in TRACKERS, 'needs opencv-contrib-python')
+    def test_opencv_tracker_continues_across_frames(self):
+        frames = [shift_frame(make_textured_frame(), 3 * i, 0) for i in range(6)]
+        for name in ['kcf', 'csrt']:
+            with self.subTest(tracker=name):
+                # Without motion gating, so every frame is tracked by the continued OpenCV tracker
+                tracker = create_tracker(name, gate_motion=False)
+                boxes = [BoxData((100, 80, 60, 50), ['pin'], 'user')]
+                for i in range(1, len(frames)):
+                    boxes = tracker.track_boxes(i - 1, frames[i - 1], i, frames[i], boxes)
+                    self.assertEqual(len(boxes), 1)
+                    self.assertAlmostEqual(boxes[0].coords[0], 100 + 3 * i, delta=2)
+
+    def test_track_boxes_records_latency(self):
+        tracker = create_tracker('template')
+        frame = make_textured_frame()
+        tracker.track_boxes(0, frame, 1, shift_frame(frame, 2, 0), [BoxData((100, 80, 60, 50), ['pin'], 'user')])
+        self.assertGreater(tracker.last_frame_seconds, 0)
+        self.assertEqual(tracker.mean_frame_seconds, tracker.last_frame_seconds)
+
+    def test_template_tracker_loses_box_on_unrelated_frame(self):
+        box = BoxData((100, 80, 60, 50), ['pin'], 'user')
+        found = create_tracker('template').track(0, make_textured_frame(0), 1, make_textured_frame(1), box)
+        self.assertIsNone(found)
+
+    def test_unknown_tracker(self):
+        with self.assertRaises(ValueError):
+            create_tracker('nonexistent')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import cv2
+import numpy as np
+
+from keyframeindex import KeyframeIndex
+
+FrameIndex = int
+
+
+class VideoReader:
+    """Decodes BGR frames from a video file, reading forward instead of seeking whenever that is cheaper.
+
+    Not thread-safe; callers sharing a reader between threads must serialise access.
+    """
+    __cap: cv2.VideoCapture
+    __next_index: FrameIndex  # Frame the decoder will return on the next read(), or -1 if unknown
+    keyframe_index: KeyframeIndex | None
+
+    def __init__(self, video_path: str, keyframe_index: KeyframeIndex | None = None):
+        self.__cap = cv2.VideoCapture(video_path)
+        if not self.__cap.isOpened():
+            raise ValueError(f"Could not open video file {video_path}")
+        self.__next_index = 0
+        self.keyframe_index = keyframe_index
+
+    @property
+    def frame_count(self) -> int:
+        return int(self.__cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    @property
+    def fps(self) -> float:
+        return self.__cap.get(cv2.CAP_PROP_FPS)
+
+    def __can_read_forward_to(self, index: FrameIndex) -> bool:
+        """Check whether reading forward reaches index with less decoding than a seek would."""
+        position = self.__next_index
+        if position < 0 or index < position:
+            return False
+        if index == position:
+            return True
+        # A seek decodes from the keyframe at or before index, so reading forward is
+        # cheaper whenever the decoder is already past that keyframe.
+        return self.keyframe_index is not None and self.keyframe_index.keyframe_at_or_before(index) <= position
+
+    def read(self, index: FrameIndex) -> np.ndarray | None:
+        """Decode the frame at index."""
+        if self.__can_read_forward_to(index):
+            while self.__next_index < index:
+                if not self.__cap.grab():
+                    self.__next_index = -1
+                    return None
+                self.__next_index += 1
+        else:
+            # Seeking makes the decoder restart from the nearest keyframe, so only
+            # do it when we can't read forward from the current position.
+            self.__cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        ret, frame = self.__cap.read()
+        if not ret:
+            self.__next_index = -1
+            return None
+        self.__next_index = index + 1
+        return frame
+
+    def release(self) -> None:
+        self.__cap.release()
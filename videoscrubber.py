@@ -1,7 +1,12 @@
-import cv2
+import threading
+
+import numpy as np
 import wx
 
+from keyframeindex import KeyframeIndex, create_keyframe_index_name_from_filename
+from logutil import getLog
 from scrubberframe import ScrubberFrame
+from videoreader import VideoReader
 
 class VideoScrubber(ScrubberFrame):
     @property
@@ -9,22 +14,42 @@ class VideoScrubber(ScrubberFrame):
         return self._current_index
 
     def __init__(self, parent, title, video_path=None, image_array=None, box_data: str | None = None):
-        self.cap = None
+        self.video_reader: VideoReader | None = None
         self.num_frames = 0
         self.image_array = image_array
         if video_path:
-            self.cap = cv2.VideoCapture(video_path)
-            self.num_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            self.video_reader = VideoReader(video_path)
+            self.num_frames = self.video_reader.frame_count
         elif image_array:
             self.num_frames = len(image_array)
         else:
             raise ValueError("Either video_path or image_array must be provided.")
         super().__init__(parent, title, self.num_frames)
         self.get_frame(0)
+        self.start_prefetcher()
 
         if video_path is not None:
             self.box_data_filename = self.create_box_data_name_from_filename(video_path)
+            self.load_keyframe_index(video_path)
+
+    def load_keyframe_index(self, video_path: str) -> None:
+        """Load or build the keyframe index for the video on a background thread."""
+        index_filename = create_keyframe_index_name_from_filename(video_path)
+
+        def load() -> None:
+            try:
+                index = KeyframeIndex.load_or_build(video_path, index_filename)
+            except Exception as e:
+                getLog().warning(f'Keyframe index unavailable for {video_path}: {e}')
+                return
+            wx.CallAfter(self.__set_keyframe_index, index)
+
+        threading.Thread(target=load, name='KeyframeIndexLoader', daemon=True).start()
 
+    def __set_keyframe_index(self, index: KeyframeIndex) -> None:
+        self.keyframe_index = index
+        with self._decode_lock:
+            self.video_reader.keyframe_index = index
 
     # @ScrubberFrame.current_index.setter
     # def current_index(self, index):
@@ -32,31 +57,18 @@ class VideoScrubber(ScrubberFrame):
     #     self.get_frame(self._current_index)
     #     self.display_image()
 
-    def get_frame(self, index, rotation_angle: int = 0):
-        if self.cap:
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
-            ret, frame = self.cap.read()
-            if not ret:
-                return None
-            img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    def decode_frame(self, index: int) -> np.ndarray | None:
+        if self.video_reader:
+            return self.video_reader.read(index)
         elif self.image_array:
-            img = cv2.cvtColor(self.image_array[index], cv2.COLOR_BGR2RGB)
-        else:
-            return None
-
-        if rotation_angle % 360 == 90:
-            img = cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
-        elif rotation_angle % 360 == 180:
-            img = cv2.rotate(img, cv2.ROTATE_180)
-        elif rotation_angle % 360 == 270:
-            img = cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
-
-        self.Layout()
-        self.Refresh()
-
-        return img
+            # A view, so caching it doesn't make the caller's array read-only
+            return self.image_array[index].view()
+        return None
 
     def __del__(self):
-        if self.cap:
-            self.cap.release()
+        if self._prefetcher is not None:
+            self._prefetcher.stop()
+        if self.video_reader:
+            with self._decode_lock:
+                self.video_reader.release()
 